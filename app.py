@@ -1,11 +1,13 @@
 import streamlit as st
 import json
 import os
-from utils.firebase_simple_config import FirebaseSimpleManager
-from utils.ai_service import get_definition_and_examples
+from utils.storage import create_data_manager
+from utils.http_transport import get_transport
+from utils.ai_service import stream_definition_and_examples
 from utils.audio_service import play_audio_button, create_content_with_audio
 from utils.firebase_auth import init_auth_session, is_authenticated, logout_user, get_current_user, current_user
-import time
+from utils.instrumentation import start_rerun
+from utils.background_writes import report_writes, submit_write
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -19,6 +21,9 @@ st.set_page_config(page_title=APP_NAME,
                    layout="wide",
                    initial_sidebar_state="expanded")
 
+# Record the external calls made by this run
+start_rerun("app")
+
 # Custom CSS for attractive design
 st.markdown("""
     <style>
@@ -176,7 +181,7 @@ if not is_authenticated():
 # Initialize Firebase
 @st.cache_resource
 def init_firebase():
-    return FirebaseSimpleManager()
+    return create_data_manager(transport=get_transport())
 
 
 firebase_manager = init_firebase()
@@ -186,9 +191,25 @@ if 'selected_word_details' not in st.session_state:
     st.session_state.selected_word_details = None
 
 
+# Labels of the fields shown while the model is still writing
+PREVIEW_LABELS = {
+    'word': "Mot",
+    'translation': "Signification (FR)",
+    'definition': "Définition (EN)",
+    'example1': "Exemple 1",
+    'example2': "Exemple 2",
+}
+
+def show_partial_word_data(word_data):
+    """Show the fields generated so far, in display order"""
+    for field, label in PREVIEW_LABELS.items():
+        if word_data.get(field):
+            st.markdown(f"**{label}:** {word_data[field]}")
+
 def main():
     #  Get current user information and Add logout button in sidebar
     current_user()
+    report_writes()
     
     # Hero header
     st.markdown("""
@@ -219,15 +240,22 @@ def main():
 
         # Process word when button is clicked
         if validate_btn and word_input.strip():
+            # Each field shows up as soon as the model has written it
+            preview = st.empty()
+            word_data = None
             with st.spinner("Génération du contenu en cours..."):
-                word_data = get_definition_and_examples(word_input.strip())
-                if word_data:
-                    st.session_state.current_word_data = word_data
-                    st.success("Contenu généré avec succès!")
-                else:
-                    st.error(
-                        "Erreur lors de la génération du contenu. Veuillez réessayer."
-                    )
+                for word_data in stream_definition_and_examples(word_input.strip()):
+                    with preview.container():
+                        show_partial_word_data(word_data)
+            # Replaced by the full display below, with its audio buttons
+            preview.empty()
+            if word_data:
+                st.session_state.current_word_data = word_data
+                st.success("Contenu généré avec succès!")
+            else:
+                st.error(
+                    "Erreur lors de la génération du contenu. Veuillez réessayer."
+                )
 
 
         # Display generated content
@@ -280,23 +308,12 @@ def main():
             if st.button("➕ Ajouter dans My Words",
                          type="secondary",
                          use_container_width=True):
-                try:
-                    # Save to Firebase
-                    success = firebase_manager.add_word(word_data)
-                    if success:
-                        st.success(
-                            f"'{word_data.get('word', word_input)}' ajouté à vos mots!"
-                        )
-                        # Clear current word data
-                        del st.session_state.current_word_data
-                        time.sleep(3)
-                        st.rerun()
-                    else:
-                        st.error(
-                            "Erreur lors de la sauvegarde. Veuillez réessayer."
-                        )
-                except Exception as e:
-                    st.error(f"Erreur: {str(e)}")
+                # Saved in the background: the outcome shows up as a toast
+                submit_write(f"'{word_data.get('word', word_input)}' ajouté à vos mots",
+                             firebase_manager.add_word_outcome, word_data)
+                # Clear current word data
+                del st.session_state.current_word_data
+                st.rerun()
 
 if __name__ == "__main__":
     main()
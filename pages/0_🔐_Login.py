@@ -5,6 +5,7 @@ import streamlit as st
 import re
 import time
 from utils.firebase_auth import FirebaseAuth, init_auth_session, login_user, is_authenticated, current_user
+from utils.instrumentation import start_rerun
 
 # Page configuration
 st.set_page_config(
@@ -13,6 +14,9 @@ st.set_page_config(
     layout="centered"
 )
 
+# Record the external calls made by this run
+start_rerun("login")
+
 # Initialize authentication
 init_auth_session()
 auth = FirebaseAuth()
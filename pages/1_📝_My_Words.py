@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
-from utils.firebase_simple_config import FirebaseSimpleManager
+from utils.storage import create_data_manager
+from utils.http_transport import get_transport
 from utils.audio_service import play_audio_button, create_content_with_audio
 from utils.firebase_auth import init_auth_session, is_authenticated, get_current_user, logout_user, current_user
+from utils.instrumentation import start_rerun
+from utils.background_writes import report_writes
 
 
 # Page configuration
@@ -12,6 +15,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Record the external calls made by this run
+start_rerun("my_words")
+
 # Initialize authentication
 init_auth_session()
 
@@ -24,40 +30,64 @@ if not is_authenticated():
 
 # Get current user information
 current_user()
+report_writes()
 
 # Initialize Firebase
 @st.cache_resource
 def init_firebase():
-    return FirebaseSimpleManager()
+    return create_data_manager(transport=get_transport())
 
 firebase_manager = init_firebase()
 
+# Number of words shown per page
+PAGE_SIZE = 20
+
+# Cursors of the pages visited so far; the last one is the current page
+if 'words_page_cursors' not in st.session_state:
+    st.session_state.words_page_cursors = [None]
+
 def main():
     st.title("📝 My Words - Mes Mots")
     st.markdown("Voici tous vos mots sauvegardés avec leurs détails")
     
-    # Get all words from database
     try:
-        words = firebase_manager.get_all_words()
+        total_words = firebase_manager.get_total_words_count()
         
-        if not words:
+        if not total_words:
             st.info("Aucun mot enregistré pour le moment. Allez sur la page d'accueil pour ajouter des mots!")
             # st.markdown("👉 [Retour à l'accueil](../)")
             if st.button("🏠 Aller à l'accueil", type="primary"):
                 st.switch_page("app.py")
             return
         
-        st.success(f"📊 Total: {len(words)} mots enregistrés")
+        st.success(f"📊 Total: {total_words} mots enregistrés")
         
         # Create search functionality
         search_term = st.text_input("🔍 Rechercher un mot", placeholder="Tapez pour filtrer...")
         
         # Filter words based on search
         if search_term:
+            # Searching needs the whole list; browsing only loads the visible page
+            words = firebase_manager.get_all_words()
             filtered_words = [word for word in words if search_term.lower() in word.get('word', '').lower() 
                             or search_term.lower() in word.get('translation', '').lower()]
         else:
-            filtered_words = words
+            cursors = st.session_state.words_page_cursors
+            page = firebase_manager.get_words_page(cursor=cursors[-1], limit=PAGE_SIZE)
+            filtered_words = page['words']
+            
+            # Page navigation
+            col_prev, col_page, col_next = st.columns([1, 2, 1])
+            with col_prev:
+                if st.button("⬅️ Précédent", disabled=len(cursors) == 1, use_container_width=True):
+                    cursors.pop()
+                    st.rerun()
+            with col_page:
+                st.markdown(f"Page {len(cursors)} / {max(1, -(-total_words // PAGE_SIZE))}")
+            with col_next:
+                if st.button("Suivant ➡️", disabled=page['next_cursor'] is None, use_container_width=True):
+                    cursors.append(page['next_cursor'])
+                    st.rerun()
         
         if not filtered_words:
             st.warning(f"Aucun mot trouvé pour '{search_term}'")
@@ -66,13 +96,12 @@ def main():
         # Display words in a table format
         st.markdown("### 📋 Liste des mots")
         
-        # Create DataFrame for better display
+        # Create DataFrame for better display (the list only carries words and translations)
         df_data = []
         for word in filtered_words:
             df_data.append({
                 'Mot': word.get('word', ''),
-                'Traduction': word.get('translation', ''),
-                'Définition': word.get('definition', '')[:80] + '...' if len(word.get('definition', '')) > 80 else word.get('definition', '')
+                'Traduction': word.get('translation', '')
             })
         
         df = pd.DataFrame(df_data)
@@ -84,8 +113,7 @@ def main():
             hide_index=True,
             column_config={
                 "Mot": st.column_config.TextColumn("Mot anglais", width="medium"),
-                "Traduction": st.column_config.TextColumn("Traduction française", width="medium"), 
-                "Définition": st.column_config.TextColumn("Définition (aperçu)", width="large")
+                "Traduction": st.column_config.TextColumn("Traduction française", width="medium")
             }
         )
         
@@ -118,6 +146,11 @@ def main():
                     content_type="markdown"
                 )
                 
+                # Definition and examples are only downloaded for the words the user opens
+                if not st.toggle("Afficher la définition et les exemples", key=f"show_details_{i}_{word.get('word')}"):
+                    continue
+                word = firebase_manager.get_word_details(word)
+                
                 create_content_with_audio(
                     f"**📖 Définition (EN):** {word.get('definition', '')}", 
                     word.get('definition', ''), 
@@ -157,10 +190,10 @@ def main():
         
         with col1:
             if st.button("🎮 Jouer au Quiz", type="primary", use_container_width=True):
-                if len(words) >= 15:
+                if total_words >= 15:
                     st.switch_page("pages/2_🎮_Game.py")
                 else:
-                    st.warning(f"Il vous faut au moins 15 mots pour jouer. Vous en avez {len(words)}.")
+                    st.warning(f"Il vous faut au moins 15 mots pour jouer. Vous en avez {total_words}.")
         
         with col2:
             if st.button("📊 Voir les Statistiques", use_container_width=True):
@@ -1,8 +1,11 @@
 import streamlit as st
 import random
-from utils.firebase_simple_config import FirebaseSimpleManager
+from utils.storage import create_data_manager
+from utils.http_transport import get_transport
 from utils.audio_service import play_audio_button, create_content_with_audio
 from utils.firebase_auth import init_auth_session, is_authenticated, get_current_user, logout_user, current_user
+from utils.instrumentation import start_rerun
+from utils.background_writes import report_writes, submit_write
 
 # Page configuration
 st.set_page_config(
@@ -11,6 +14,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Record the external calls made by this run
+start_rerun("game")
+
 # Initialize authentication
 init_auth_session()
 
@@ -24,7 +30,7 @@ if not is_authenticated():
 # Initialize Firebase
 @st.cache_resource
 def init_firebase():
-    return FirebaseSimpleManager()
+    return create_data_manager(transport=get_transport())
 
 firebase_manager = init_firebase()
 
@@ -101,6 +107,16 @@ def start_new_game(mode="translation"):
         # Select 10 random words for the quiz
         quiz_words = random.sample(all_words, 10)
         
+        # The word list only holds words and translations: fetch the details of the
+        # quiz words, and in definition mode of a few others to draw wrong answers from
+        decoys = []
+        if mode == "definition":
+            others = [word for word in all_words if word not in quiz_words]
+            decoys = random.sample(others, min(10, len(others)))
+        detailed_words = firebase_manager.get_words_details(quiz_words + decoys)
+        quiz_words = detailed_words[:len(quiz_words)]
+        answer_pool = detailed_words if mode == "definition" else all_words
+        
         # Prepare quiz data with multiple choices based on mode
         quiz_data = []
         for word in quiz_words:
@@ -111,7 +127,7 @@ def start_new_game(mode="translation"):
                 correct_answer = word.get('definition', '')
                 question_text = word.get('word', '')
             
-            wrong_answers = generate_wrong_answers(correct_answer, all_words, mode)
+            wrong_answers = generate_wrong_answers(correct_answer, answer_pool, mode)
             
             # Create choices list and shuffle
             choices = [correct_answer] + wrong_answers
@@ -169,17 +185,17 @@ def submit_answer(selected_choice):
         st.session_state.game_completed = True
         st.session_state.game_active = False
         
-        # Save score to database
-        try:
-            firebase_manager.save_game_result(st.session_state.score, len(st.session_state.quiz_words))
-        except Exception as e:
-            st.error(f"Erreur lors de la sauvegarde du score: {str(e)}")
+        # Save score in the background; the results screen does not wait for it
+        total = len(st.session_state.quiz_words)
+        submit_write(f"Score {st.session_state.score}/{total} enregistré",
+                     firebase_manager.save_game_outcome, st.session_state.score, total)
 
 def main():
     st.title("🎮 Game - Quiz de Vocabulaire")
 
     # display current user info
     current_user()
+    report_writes()
     
     # Check if user has enough words
     try:
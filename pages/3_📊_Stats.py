@@ -3,8 +3,12 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 from datetime import datetime, timedelta
-from utils.firebase_simple_config import FirebaseSimpleManager
+from utils.storage import create_data_manager
+from utils.http_transport import get_transport
+from utils.firebase_async import gather_reads
 from utils.firebase_auth import init_auth_session, is_authenticated, get_current_user, logout_user, current_user
+from utils.instrumentation import start_rerun
+from utils.background_writes import report_writes
 
 # Page configuration
 st.set_page_config(
@@ -13,6 +17,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Record the external calls made by this run
+start_rerun("stats")
+
 # Initialize authentication
 init_auth_session()
 
@@ -25,11 +32,12 @@ if not is_authenticated():
 
 # Get current user information
 current_user()
+report_writes()
 
 # Initialize Firebase
 @st.cache_resource
 def init_firebase():
-    return FirebaseSimpleManager()
+    return create_data_manager(transport=get_transport())
 
 firebase_manager = init_firebase()
 
@@ -77,9 +85,10 @@ def main():
     
     try:
         # Get statistics
-        total_words = firebase_manager.get_total_words_count()
-        game_stats = firebase_manager.get_game_stats()
-        monthly_data = firebase_manager.get_monthly_progress()
+        # The three reads are independent: fetch them concurrently
+        total_words, game_stats, monthly_data = gather_reads(
+            firebase_manager, 'get_total_words_count', 'get_game_stats', 'get_monthly_progress'
+        )
         
         # Overview metrics
         st.markdown("### 📈 Vue d'ensemble")
@@ -1,9 +1,12 @@
 import streamlit as st
 import json
 import re
-from utils.firebase_simple_config import FirebaseSimpleManager
+from utils.storage import create_data_manager
+from utils.http_transport import get_transport
 from utils.firebase_auth import init_auth_session, is_authenticated, current_user
-from utils.ai_service import client, get_definition_and_examples, validate_word_data
+from utils.background_writes import report_writes, submit_write
+from utils.ai_service import create_completion, get_definitions_batch, validate_word_data
+from utils.instrumentation import start_rerun
 
 # Page configuration
 st.set_page_config(
@@ -12,6 +15,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Record the external calls made by this run
+start_rerun("learn")
+
 # Initialize auth
 init_auth_session()
 
@@ -24,11 +30,12 @@ if not is_authenticated():
 
 # Show current user and logout
 current_user()
+report_writes()
 
 # Initialize firebase manager
 @st.cache_resource
 def init_firebase():
-    return FirebaseSimpleManager()
+    return create_data_manager(transport=get_transport())
 
 firebase_manager = init_firebase()
 
@@ -135,7 +142,8 @@ def request_ai_suggestions(count=7, level="Any", context="Any"):
     Example: ["serendipity", "break the ice", "procrastinate", "state of the art", "mindset"]"""
     
     try:
-        response = client.chat.completions.create(
+        response = create_completion(
+            "hf chat.completions (suggestions)",
             model="HuggingFaceH4/zephyr-7b-beta",
             messages=[
                 {"role": "system", "content": "You are a helpful English vocabulary teacher. Always respond with valid JSON arrays only, no other text."},
@@ -193,25 +201,30 @@ def generate_suggestions(count=5, level="Any", context="Any"):
         st.error(f"Erreur lors de la génération des suggestions: {str(e)}")
         return []
 
-def load_word_details(word):
-    """Load detailed information for a word."""
+def load_words_details(words):
+    """Load detailed information for several words with a single AI request."""
     try:
-        word_data = get_definition_and_examples(word)
-        
-        if word_data and validate_word_data(word_data):
-            return word_data
-        else:
-            # Create minimal valid word data
-            return {
-                'word': word,
-                'definition': f"An English word or expression: {word}",
-                'translation': f"Mot anglais: {word}",
-                'example1': f"I learned the word '{word}' today.",
-                'example2': f"The term '{word}' is useful in English."
-            }
+        details = {}
+        for word, word_data in zip(words, get_definitions_batch(words)):
+            if word_data and validate_word_data(word_data):
+                details[word] = word_data
+            else:
+                # Create minimal valid word data
+                details[word] = {
+                    'word': word,
+                    'definition': f"An English word or expression: {word}",
+                    'translation': f"Mot anglais: {word}",
+                    'example1': f"I learned the word '{word}' today.",
+                    'example2': f"The term '{word}' is useful in English."
+                }
+        return details
     except Exception as e:
-        st.error(f"Erreur lors du chargement des détails pour '{word}': {str(e)}")
-        return None
+        st.error(f"Erreur lors du chargement des détails: {str(e)}")
+        return {}
+
+def load_word_details(word):
+    """Load detailed information for a word."""
+    return load_words_details([word]).get(word)
 
 # Initialize session state
 if 'learn_suggestions' not in st.session_state:
@@ -256,7 +269,8 @@ if generate_clicked:
             
             if new_suggestions:
                 st.session_state.learn_suggestions = new_suggestions
-                st.session_state.learn_word_details = {}  # Clear cached details
+                # Details of every suggestion are prefetched in one request
+                st.session_state.learn_word_details = load_words_details(new_suggestions)
                 st.session_state.learn_added_words = set()  # Reset for new batch
                 st.success(f"✅ {len(new_suggestions)} nouvelles suggestions générées!")
             else:
@@ -274,6 +288,7 @@ if not st.session_state.learn_suggestions and not st.session_state.learn_loading
         try:
             initial_suggestions = generate_suggestions(count=5, level=level, context=context)
             st.session_state.learn_suggestions = initial_suggestions
+            st.session_state.learn_word_details = load_words_details(initial_suggestions)
         except Exception as e:
             st.error(f"Erreur lors du chargement initial: {str(e)}")
         finally:
@@ -286,7 +301,31 @@ if not suggestions:
     st.info("🔄 Cliquez sur 'Nouvelles suggestions' pour générer des mots à apprendre.")
 else:
     st.markdown(f"### 💡 Suggestions ({len(suggestions)} mots)")
-    
+
+    # Add every remaining suggestion in a single database write
+    pending_words = [word for word in suggestions if word not in st.session_state.learn_added_words]
+    if pending_words and st.button("➕ Tout ajouter", key="add_all"):
+        with st.spinner("Ajout des suggestions..."):
+            missing = [word for word in pending_words if word not in st.session_state.learn_word_details]
+            if missing:
+                st.session_state.learn_word_details.update(load_words_details(missing))
+
+            loaded_words = [word for word in pending_words if word in st.session_state.learn_word_details]
+            outcomes = firebase_manager.add_words([st.session_state.learn_word_details[word] for word in loaded_words])
+
+        added_count = 0
+        for word, outcome in zip(loaded_words, outcomes):
+            if outcome['status'] in ('added', 'duplicate'):
+                st.session_state.learn_added_words.add(word)
+            if outcome['status'] == 'added':
+                added_count += 1
+
+        if added_count:
+            st.success(f"✅ {added_count} mot(s) ajouté(s) à votre vocabulaire!")
+            st.rerun()
+        else:
+            st.warning("⚠️ Aucun nouveau mot ajouté.")
+
     for i, word in enumerate(suggestions):
         with st.expander(f"📝 {word}", expanded=False):
             col_info, col_actions = st.columns([3, 1])
@@ -331,16 +370,11 @@ else:
                         # Add to database
                         if word in st.session_state.learn_word_details:
                             word_data = st.session_state.learn_word_details[word]
-                            try:
-                                success = firebase_manager.add_word(word_data)
-                                if success:
-                                    st.session_state.learn_added_words.add(word)
-                                    st.success(f"✅ '{word}' ajouté à votre vocabulaire!")
-                                    st.rerun()
-                                else:
-                                    st.error("❌ Erreur: Le mot existe peut-être déjà.")
-                            except Exception as e:
-                                st.error(f"❌ Erreur lors de l'ajout: {str(e)}")
+                            # Shown as added right away; a failure comes back as a toast with a retry
+                            submit_write(f"'{word}' ajouté à votre vocabulaire",
+                                         firebase_manager.add_word_outcome, word_data)
+                            st.session_state.learn_added_words.add(word)
+                            st.rerun()
                         else:
                             st.error("❌ Impossible de charger les détails.")
 
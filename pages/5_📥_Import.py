@@ -0,0 +1,103 @@
+import io
+import streamlit as st
+from utils.storage import create_data_manager
+from utils.http_transport import get_transport
+from utils.bulk_import import file_fingerprint, import_words, iter_import_rows
+from utils.firebase_auth import init_auth_session, is_authenticated, current_user
+from utils.instrumentation import start_rerun
+from utils.background_writes import report_writes
+
+# Page configuration
+st.set_page_config(
+    page_title="Import - VocabMaster",
+    page_icon="📥",
+    layout="wide"
+)
+
+# Record the external calls made by this run
+start_rerun("import")
+
+# Initialize authentication
+init_auth_session()
+
+# Check authentication
+if not is_authenticated():
+    st.warning("Vous devez vous connecter pour importer des mots.")
+    if st.button("🔑 Se connecter", type="primary"):
+        st.switch_page("pages/0_🔐_Login.py")
+    st.stop()
+
+# Get current user information
+current_user()
+report_writes()
+
+# Initialize Firebase
+@st.cache_resource
+def init_firebase():
+    return create_data_manager(transport=get_transport())
+
+firebase_manager = init_firebase()
+
+# Rows already saved per file, so an interrupted import resumes where it stopped
+if 'import_checkpoints' not in st.session_state:
+    st.session_state.import_checkpoints = {}
+
+def main():
+    st.title("📥 Import - Importer une liste de mots")
+    st.markdown(
+        "Importez un fichier **CSV**, **TSV** ou un export texte **Anki**. "
+        "Colonnes reconnues : mot, traduction, définition, exemple 1, exemple 2 "
+        "(sans en-tête, elles sont lues dans cet ordre)."
+    )
+
+    uploaded = st.file_uploader("📄 Fichier à importer", type=['csv', 'tsv', 'txt'])
+    enrich = st.checkbox("✨ Compléter les traductions et définitions manquantes avec l'IA", value=True)
+
+    if not uploaded:
+        return
+
+    fingerprint = file_fingerprint(uploaded.name, uploaded.size)
+    start_at = st.session_state.import_checkpoints.get(fingerprint, 0)
+    if start_at:
+        st.info(f"Import déjà commencé : reprise après {start_at} lignes.")
+
+    if not st.button("📥 Importer", type="primary"):
+        return
+
+    # Only used for the progress bar; the file itself is read as a stream
+    estimated_rows = max(1, uploaded.getvalue().count(b'\n'))
+    progress = st.progress(min(1.0, start_at / estimated_rows), text="Import en cours...")
+
+    def on_chunk(position, totals):
+        st.session_state.import_checkpoints[fingerprint] = position
+        progress.progress(
+            min(1.0, position / estimated_rows),
+            text=f"{position} lignes traitées - {totals['added']} ajoutés, {totals['duplicate']} doublons"
+        )
+
+    uploaded.seek(0)
+    stream = io.TextIOWrapper(uploaded, encoding='utf-8-sig', newline='')
+    try:
+        totals = import_words(firebase_manager, iter_import_rows(stream, uploaded.name),
+                              start_at=start_at, enrich=enrich, on_chunk=on_chunk)
+    except Exception as e:
+        st.error(f"Erreur lors de l'import: {str(e)}")
+        return
+    finally:
+        stream.detach()
+
+    if totals['completed']:
+        st.session_state.import_checkpoints.pop(fingerprint, None)
+        progress.progress(1.0, text="Import terminé")
+        st.success(
+            f"✅ {totals['added']} mots ajoutés, {totals['duplicate']} doublons ignorés, "
+            f"{totals['invalid']} lignes invalides."
+        )
+    else:
+        st.warning(
+            f"Import interrompu après {totals['position']} lignes. "
+            "Cliquez à nouveau sur Importer pour reprendre."
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import threading
+import time
+
+import pytest
+import streamlit as st
+
+from utils.rtdb_emulator import serve
+
+
+def sign_in(user_id):
+    """Session state of a signed-in user whose token is still valid."""
+    st.session_state.update({
+        'authenticated': True, 'user_id': user_id, 'username': 'test', 'user_email': 'test@example.com',
+        'auth_token': 'token', 'refresh_token': 'refresh', 'token_expires_at': time.time() + 3600,
+    })
+
+
+@pytest.fixture
+def emulator():
+    """Base URL of a local Realtime Database stand-in, empty for each test."""
+    server = serve(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,45 @@
+import io
+
+from utils.bulk_import import iter_import_rows
+
+
+def rows(text, filename=''):
+    return list(iter_import_rows(io.StringIO(text), filename))
+
+
+def test_csv_with_header():
+    result = rows("Word,Translation,Definition\nserendipity,sérendipité,A happy accident\n", 'words.csv')
+    assert result == [{'word': 'serendipity', 'translation': 'sérendipité', 'definition': 'A happy accident'}]
+
+
+def test_headerless_rows_use_default_column_order():
+    result = rows("serendipity;sérendipité\nbreak the ice;briser la glace\n")
+    assert [row['word'] for row in result] == ['serendipity', 'break the ice']
+    assert result[0]['translation'] == 'sérendipité'
+    assert result[0]['example2'] == ''
+
+
+def test_blank_rows_are_skipped():
+    result = rows("word\ttranslation\n\n \t \nserendipity\tsérendipité\n", 'words.tsv')
+    assert [row['word'] for row in result] == ['serendipity']
+
+
+def test_anki_columns_header_counts_skipped_columns():
+    text = "#separator:tab\n#notetype column:1\n#columns:Notetype\tFront\tBack\nBasic\tserendipity\tsérendipité\n"
+    result = rows(text, 'deck.txt')
+    assert result == [{'word': 'serendipity', 'translation': 'sérendipité'}]
+
+
+def test_anki_skipped_columns_without_columns_header():
+    text = "#separator:tab\n#deck column:1\n#tags column:4\nDefault\tserendipity\tsérendipité\tenglish\n"
+    result = rows(text, 'deck.txt')
+    assert result[0]['word'] == 'serendipity'
+    assert result[0]['translation'] == 'sérendipité'
+    assert result[0]['definition'] == ''
+
+
+def test_anki_html_is_stripped():
+    text = "#separator:semicolon\n#html:true\n<b>serendipity</b>;sérendipité<br>(n.)\n"
+    result = rows(text)
+    assert result[0]['word'] == 'serendipity'
+    assert result[0]['translation'] == 'sérendipité (n.)'
@@ -0,0 +1,110 @@
+import os
+
+import requests
+
+from conftest import sign_in
+from utils.firebase_simple_config import FirebaseSimpleManager
+from utils.http_transport import HttpTransport
+from utils.local_mirror import PUT_IF_ABSENT, LocalMirror, OutboxFlusher
+from utils.word_cache import DetailCache, WordCache
+
+USER_ID = 'u1'
+
+
+def lose_responses(transport, method, times=1, when=lambda kwargs: True):
+    """Make the server apply the next `times` matching requests but their responses time out."""
+    send = transport.session.request
+    lost = {'left': times}
+
+    def request(request_method, url, **kwargs):
+        response = send(request_method, url, **kwargs)
+        if request_method == method and lost['left'] and when(kwargs):
+            lost['left'] -= 1
+            response.close()
+            raise requests.ReadTimeout("response lost")
+        return response
+
+    transport.session.request = request
+
+
+def conditional(kwargs):
+    return 'if-match' in (kwargs.get('headers') or {})
+
+
+def read(transport, url, path):
+    return transport.get(f"{url}/{path}.json").json()
+
+
+def test_add_word_survives_a_lost_create_response(emulator):
+    transport = HttpTransport(max_retries=2)
+    lose_responses(transport, 'PUT', when=conditional)
+    sign_in(USER_ID)
+    manager = FirebaseSimpleManager(transport=transport, word_cache=WordCache(), detail_cache=DetailCache(),
+                                    database_url=emulator)
+
+    assert manager.add_word_outcome({'word': 'cat', 'definition': 'A small pet.'}) == ('added', None)
+    assert read(transport, emulator, f"word_details/{USER_ID}/cat")['definition'] == 'A small pet.'
+    assert read(transport, emulator, f"word_stats/{USER_ID}/total") == 1
+
+
+def test_add_word_reports_another_sessions_word_as_duplicate(emulator):
+    transport = HttpTransport(max_retries=0)
+    sign_in(USER_ID)
+    manager = FirebaseSimpleManager(transport=transport, word_cache=WordCache(), detail_cache=DetailCache(),
+                                    database_url=emulator)
+    transport.request('PUT', f"{emulator}/words/{USER_ID}/cat.json", json={'word': 'cat', 'id': 'other'})
+
+    status, _ = manager.add_word_outcome({'word': 'cat'})
+    assert status == 'duplicate'
+    assert read(transport, emulator, f"word_details/{USER_ID}/cat") is None
+
+
+def make_flusher(tmp_path, transport, url):
+    mirror = LocalMirror(os.path.join(tmp_path, 'mirror.db'))
+    flusher = OutboxFlusher(mirror, transport, url)
+    flusher._credentials[USER_ID] = {'token': 'token', 'refresh_token': 'refresh', 'expires_at': float('inf')}
+    return mirror, flusher
+
+
+def queue_word(mirror, word, word_id):
+    record = {'word': word, 'id': word_id, 'created_at': '2024-01-01T10:00:00'}
+    mirror.write('words', USER_ID, {word: record}, PUT_IF_ABSENT, f"words/{USER_ID}/{word}", {
+        'key': word, 'record': record, 'details': {'definition': f"{word} definition"},
+        'details_path': f"word_details/{USER_ID}/{word}", 'stats_path': f"word_stats/{USER_ID}",
+    })
+
+
+def test_outbox_create_survives_a_lost_response(emulator, tmp_path):
+    transport = HttpTransport(max_retries=2)
+    lose_responses(transport, 'PUT', when=conditional)
+    mirror, flusher = make_flusher(tmp_path, transport, emulator)
+    queue_word(mirror, 'cat', 'id-1')
+
+    flusher.flush()
+    assert mirror.pending_count(USER_ID) == 0
+    assert read(transport, emulator, f"word_details/{USER_ID}/cat") == {'definition': 'cat definition'}
+    assert read(transport, emulator, f"word_stats/{USER_ID}/total") == 1
+
+
+def test_outbox_finishes_a_create_that_landed_before_a_crash(emulator, tmp_path):
+    transport = HttpTransport(max_retries=0)
+    mirror, flusher = make_flusher(tmp_path, transport, emulator)
+    queue_word(mirror, 'cat', 'id-1')
+    # The create reached the server but the process stopped before recording it
+    transport.request('PUT', f"{emulator}/words/{USER_ID}/cat.json", json={'word': 'cat', 'id': 'id-1'})
+
+    flusher.flush()
+    assert read(transport, emulator, f"word_details/{USER_ID}/cat") == {'definition': 'cat definition'}
+    assert read(transport, emulator, f"word_stats/{USER_ID}/total") == 1
+
+
+def test_outbox_drops_a_word_saved_by_another_session(emulator, tmp_path):
+    transport = HttpTransport(max_retries=0)
+    mirror, flusher = make_flusher(tmp_path, transport, emulator)
+    queue_word(mirror, 'cat', 'id-1')
+    transport.request('PUT', f"{emulator}/words/{USER_ID}/cat.json", json={'word': 'cat', 'id': 'other'})
+
+    flusher.flush()
+    assert mirror.pending_count(USER_ID) == 0
+    assert read(transport, emulator, f"word_details/{USER_ID}/cat") is None
+    assert read(transport, emulator, f"word_stats/{USER_ID}") is None
@@ -0,0 +1,78 @@
+import os
+
+from conftest import sign_in
+from test_conditional_writes import conditional, lose_responses, make_flusher, read
+from utils.firebase_simple_config import FirebaseSimpleManager
+from utils.game_stats import APPLIED_IDS_KEPT, apply_game_result, record_game_result, stats_from_results
+from utils.http_transport import HttpTransport
+from utils.local_mirror import RECORD_GAME_RESULT
+from utils.word_cache import WordCache
+
+USER_ID = 'u1'
+
+
+def game(game_id, percentage, played_at='2024-01-01T10:00:00'):
+    return {'id': game_id, 'score': percentage // 10, 'total_questions': 10, 'percentage': percentage,
+            'played_at': played_at, 'user_id': USER_ID}
+
+
+def node(transport, url, path):
+    return lambda method, **kwargs: transport.request(method, f"{url}/{path}.json", **kwargs)
+
+
+def test_a_game_is_folded_in_once():
+    stats = apply_game_result(None, game('g1', 70))
+    assert apply_game_result(stats, game('g1', 70)) == stats
+    assert apply_game_result(stats, game('g2', 90))['count'] == 2
+
+
+def test_applied_ids_keep_the_latest_games():
+    results = {f"g{index:03d}": game(f"g{index:03d}", 50, f"2024-01-01T10:{index // 60:02d}:{index % 60:02d}")
+               for index in range(APPLIED_IDS_KEPT + 10)}
+    stats = stats_from_results(results)
+    assert stats['count'] == APPLIED_IDS_KEPT + 10
+    assert len(stats['applied']) == APPLIED_IDS_KEPT
+    assert f"g{APPLIED_IDS_KEPT + 9:03d}" in stats['applied']
+    assert 'g000' not in stats['applied']
+
+
+def test_lost_transaction_response_counts_the_game_once(emulator):
+    transport = HttpTransport(max_retries=2)
+    first, second = game('g1', 100), game('g2', 90)
+    transport.request('PUT', f"{emulator}/game_results/{USER_ID}.json", json={'g1': first})
+    send = node(transport, emulator, f"game_stats/{USER_ID}")
+    send('PUT', json=stats_from_results({'g1': first}))
+
+    transport.request('PUT', f"{emulator}/game_results/{USER_ID}/g2.json", json=second)
+    lose_responses(transport, 'PUT', when=conditional)
+    record_game_result(send, lambda: read(transport, emulator, f"game_results/{USER_ID}"), second)
+
+    stats = read(transport, emulator, f"game_stats/{USER_ID}")
+    assert (stats['count'], stats['sum_percentage']) == (2, 190)
+
+
+def test_save_game_outcome_with_a_lost_response(emulator):
+    transport = HttpTransport(max_retries=2)
+    sign_in(USER_ID)
+    manager = FirebaseSimpleManager(transport=transport, word_cache=WordCache(), database_url=emulator)
+    assert manager.save_game_outcome(7, 10) == ('saved', None)
+
+    lose_responses(transport, 'PUT', when=conditional)
+    assert manager.save_game_outcome(9, 10) == ('saved', None)
+    assert manager.get_game_stats() == {'total_games': 2, 'best_score': 90.0, 'average_score': 80.0}
+
+
+def test_outbox_retry_after_a_committed_aggregate(emulator, tmp_path):
+    transport = HttpTransport(max_retries=0)
+    mirror, flusher = make_flusher(tmp_path, transport, emulator)
+    played = game('g1', 70)
+    transport.request('PUT', f"{emulator}/game_results/{USER_ID}/g1.json", json=played)
+    body = {'game': played, 'results_path': f"game_results/{USER_ID}"}
+    mirror.write('game_results', USER_ID, {}, RECORD_GAME_RESULT, f"game_stats/{USER_ID}", body)
+    # The aggregate was committed but the operation is still queued, as after a lost response
+    mirror.write('game_results', USER_ID, {}, RECORD_GAME_RESULT, f"game_stats/{USER_ID}", body)
+
+    flusher.flush()
+    assert mirror.pending_count(USER_ID) == 0
+    stats = read(transport, emulator, f"game_stats/{USER_ID}")
+    assert (stats['count'], stats['sum_percentage']) == (1, 70)
@@ -0,0 +1,35 @@
+from conftest import sign_in
+from test_conditional_writes import make_flusher
+from utils.firebase_simple_config import FirebaseSimpleManager
+from utils.http_transport import HttpTransport
+from utils.word_cache import DetailCache, WordCache
+
+USER_ID = 'u1'
+
+
+def make_manager(tmp_path, url, word_cache=None):
+    transport = HttpTransport(max_retries=0)
+    mirror, mirror.flusher = make_flusher(tmp_path, transport, url)
+    sign_in(USER_ID)
+    manager = FirebaseSimpleManager(transport=transport, word_cache=word_cache or WordCache(), mirror=mirror,
+                                    database_url=url, detail_cache=DetailCache())
+    return manager, mirror
+
+
+def test_queued_word_survives_a_full_refetch(emulator, tmp_path):
+    # A new user has no high-water mark, so every refresh downloads the whole partition
+    manager, mirror = make_manager(tmp_path, emulator, WordCache(ttl=0))
+    assert manager.add_word_outcome({'word': 'cat'}) == ('added', None)
+    assert mirror.pending_count(USER_ID) == 1
+
+    assert [word['word'] for word in manager.get_all_words()] == ['cat']
+    status, _ = manager.add_word_outcome({'word': 'cat'})
+    assert status == 'duplicate'
+
+
+def test_game_stats_include_queued_games(emulator, tmp_path):
+    manager, mirror = make_manager(tmp_path, emulator)
+    assert manager.save_game_outcome(7, 10) == ('saved', None)
+    assert mirror.pending_count(USER_ID) == 2
+
+    assert manager.get_game_stats() == {'total_games': 1, 'best_score': 70.0, 'average_score': 70.0}
@@ -0,0 +1,60 @@
+from utils.migrations import plan_partition_moves
+
+
+def word(text, user_id='uid1', created_at='2024-01-01T10:00:00'):
+    return {'word': text, 'user_id': user_id, 'created_at': created_at}
+
+
+def test_empty_tree():
+    assert plan_partition_moves('words', None) == {}
+    assert plan_partition_moves('words', {}) == {}
+
+
+def test_flat_word_moves_to_its_user_under_the_normalized_word():
+    record = word('Break  the Ice')
+    updates = plan_partition_moves('words', {'-Npush1': record})
+    assert updates == {'words/uid1/break the ice': record, 'words/-Npush1': None}
+
+
+def test_user_id_is_escaped_in_the_partition():
+    record = word('cat', user_id='jane.doe@example.com')
+    updates = plan_partition_moves('words', {'-Npush1': record})
+    assert updates['words/jane%2Edoe@example%2Ecom/cat'] == record
+
+
+def test_partitioned_word_under_push_key_is_rekeyed():
+    record = word('cat')
+    updates = plan_partition_moves('words', {'uid1': {'-Npush1': record}})
+    assert updates == {'words/uid1/cat': record, 'words/uid1/-Npush1': None}
+
+
+def test_migrated_tree_needs_no_update():
+    tree = {'uid1': {'cat': word('cat'), 'dog': word('dog')}}
+    assert plan_partition_moves('words', tree) == {}
+
+
+def test_duplicates_keep_the_oldest_record():
+    older = word('Cat', created_at='2024-01-01T10:00:00')
+    newer = word('cat', created_at='2024-03-01T10:00:00')
+    updates = plan_partition_moves('words', {'-Npush2': newer, '-Npush1': older})
+    assert updates == {'words/uid1/cat': older, 'words/-Npush1': None, 'words/-Npush2': None}
+
+
+def test_flat_duplicate_of_a_migrated_word_is_dropped():
+    migrated = word('cat', created_at='2024-03-01T10:00:00')
+    legacy = word('cat', created_at='2024-01-01T10:00:00')
+    updates = plan_partition_moves('words', {'uid1': {'cat': migrated}, '-Npush1': legacy})
+    assert updates == {'words/-Npush1': None}
+
+
+def test_same_word_for_two_users_is_kept_twice():
+    first, second = word('cat', user_id='uid1'), word('cat', user_id='uid2')
+    updates = plan_partition_moves('words', {'-Npush1': first, '-Npush2': second})
+    assert updates['words/uid1/cat'] == first
+    assert updates['words/uid2/cat'] == second
+
+
+def test_game_results_keep_their_keys():
+    result = {'score': 7, 'total_questions': 10, 'user_id': 'uid1', 'played_at': '2024-01-01T10:00:00'}
+    updates = plan_partition_moves('game_results', {'-Npush1': result})
+    assert updates == {'game_results/uid1/-Npush1': result, 'game_results/-Npush1': None}
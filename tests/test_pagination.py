@@ -0,0 +1,79 @@
+import pytest
+
+from conftest import sign_in
+from utils.firebase_simple_config import FirebaseSimpleManager, page_of_records
+from utils.http_transport import HttpTransport
+from utils.storage import SQLiteStorage
+from utils.word_cache import WordCache
+
+USER_ID = 'user-1'
+
+
+def make_records(tied=10, others=25):
+    """`tied` words sharing one created_at, among `others` with distinct ones."""
+    records = {}
+    for index in range(others):
+        created_at = f"2024-01-{index + 1:02d}T10:00:00"
+        records[f"word{index:02d}"] = {'word': f"word{index:02d}", 'created_at': created_at}
+    for index in range(tied):
+        records[f"tie{index:02d}"] = {'word': f"tie{index:02d}", 'created_at': "2024-01-12T10:00:00"}
+    return records
+
+
+def walk(get_page, limit, order):
+    """Keys of every page, following next_cursor until it is None."""
+    pages, cursor = [], None
+    while True:
+        page = get_page(cursor, limit, order)
+        pages.append([word['word'] for word in page['words']])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def expected_order(records, order):
+    items = sorted((record['created_at'], key) for key, record in records.items())
+    keys = [key for _, key in items]
+    return keys[::-1] if order == 'desc' else keys
+
+
+@pytest.mark.parametrize('order', ['desc', 'asc'])
+@pytest.mark.parametrize('limit', [1, 3, 20, 50])
+def test_page_of_records_visits_every_record_once(order, limit):
+    records = make_records()
+    pages = walk(lambda cursor, limit, order: page_of_records(records, cursor, limit, order), limit, order)
+    assert [key for page in pages for key in page] == expected_order(records, order)
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+def test_page_of_records_empty():
+    assert page_of_records({}) == {'words': [], 'next_cursor': None}
+
+
+def test_page_of_records_last_full_page_has_no_cursor():
+    records = make_records(tied=0, others=4)
+    page = page_of_records(records, limit=4)
+    assert len(page['words']) == 4
+    assert page['next_cursor'] is None
+
+
+@pytest.mark.parametrize('order', ['desc', 'asc'])
+def test_page_of_records_matches_sqlite_backend(tmp_path, order):
+    records = make_records()
+    backend = SQLiteStorage(str(tmp_path / 'vocab.db'))
+    backend.add_words(USER_ID, list(records.values()))
+    sqlite_pages = walk(lambda cursor, limit, order: backend.words_page(USER_ID, cursor, limit, order), 3, order)
+    pages = walk(lambda cursor, limit, order: page_of_records(records, cursor, limit, order), 3, order)
+    assert pages == sqlite_pages
+
+
+@pytest.mark.parametrize('order', ['desc', 'asc'])
+def test_get_words_page_pages_through_tied_timestamps(emulator, order):
+    records = make_records()
+    transport = HttpTransport(max_retries=0)
+    assert transport.request('PUT', f"{emulator}/words/{USER_ID}.json", json=records).status_code == 200
+
+    sign_in(USER_ID)
+    manager = FirebaseSimpleManager(transport=transport, word_cache=WordCache(), database_url=emulator)
+    pages = walk(manager.get_words_page, 3, order)
+    assert pages == walk(lambda cursor, limit, order: page_of_records(records, cursor, limit, order), 3, order)
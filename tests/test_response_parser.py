@@ -0,0 +1,107 @@
+from utils.response_parser import (
+    FieldStreamParser, extract_fields_from_text, load_json_lenient, normalize_word_fields, parse_word_response,
+    repair_json
+)
+
+COMPLETE = {
+    'word': 'serendipity',
+    'definition': 'The occurrence of events by chance in a happy way.',
+    'translation': 'sérendipité',
+    'example1': 'Finding this café was pure serendipity.',
+    'example2': 'Serendipity led them to the discovery.',
+}
+
+
+def test_plain_json():
+    text = '{"word": "serendipity", "definition": "A happy accident.", "translation": "sérendipité"}'
+    assert parse_word_response(text) == {
+        'word': 'serendipity', 'definition': 'A happy accident.', 'translation': 'sérendipité'
+    }
+
+
+def test_code_fence_and_prose_are_ignored():
+    text = 'Here is the JSON:\n```json\n{"word": "cat", "translation": "chat"}\n```\nHope it helps!'
+    assert parse_word_response(text) == {'word': 'cat', 'translation': 'chat'}
+
+
+def test_single_quotes_trailing_commas_and_bare_keys():
+    text = "{word: 'cat', 'translation': 'chat', example1: 'The cat's tail.',}"
+    assert parse_word_response(text) == {'word': 'cat', 'translation': 'chat', 'example1': "The cat's tail."}
+
+
+def test_unescaped_quotes_inside_a_string():
+    text = '{"word": "say", "example1": "She said "hello" to me.", "translation": "dire"}'
+    assert parse_word_response(text)['example1'] == 'She said "hello" to me.'
+
+
+def test_unicode_escapes():
+    assert parse_word_response('{"translation": "s\\u00e9rendipit\\u00e9"}') == {'translation': 'sérendipité'}
+
+
+def test_truncated_answer_keeps_complete_fields_only():
+    text = '{"word": "cat", "definition": "A small pet.", "translation": "ch'
+    assert parse_word_response(text) == {'word': 'cat', 'definition': 'A small pet.'}
+
+
+def test_python_literals_are_repaired():
+    assert load_json_lenient("{'word': 'cat', 'plural': None, 'noun': True}") == {
+        'word': 'cat', 'plural': None, 'noun': True
+    }
+
+
+def test_text_after_the_value_is_not_parsed():
+    assert repair_json("{'a': 1} and {'b': 2}") == '{"a": 1}'
+
+
+def test_array_opening():
+    assert load_json_lenient('Result: [{"word": "cat"}, {"word": "dog"},]', '[') == [
+        {'word': 'cat'}, {'word': 'dog'}
+    ]
+
+
+def test_no_json_returns_none():
+    assert load_json_lenient('No JSON here') is None
+
+
+def test_aliases_and_example_lists():
+    data = {'Term': 'cat', 'Meaning': 'A small pet.', 'French Translation': 'chat',
+            'examples': ['The cat sleeps.', 'A cat purrs.', 'Ignored.'], 'notes': 'dropped'}
+    assert normalize_word_fields(data) == {
+        'word': 'cat', 'definition': 'A small pet.', 'translation': 'chat',
+        'example1': 'The cat sleeps.', 'example2': 'A cat purrs.'
+    }
+
+
+def test_empty_values_are_dropped():
+    assert normalize_word_fields({'word': 'cat', 'definition': '  ', 'translation': None}) == {'word': 'cat'}
+
+
+def test_plain_text_lines():
+    text = '**Definition:** A small pet.\n- Translation: "chat"\nExample 1: The cat sleeps.'
+    assert extract_fields_from_text(text) == {
+        'definition': 'A small pet.', 'translation': 'chat', 'example1': 'The cat sleeps.'
+    }
+
+
+def test_json_answer_is_not_mixed_with_line_extraction():
+    text = '{"word": "cat", "definition": "A small pet.", "translation": "ch'
+    assert 'translation' not in parse_word_response(text)
+
+
+def test_stream_parser_yields_each_field_once():
+    parser = FieldStreamParser()
+    text = '{"word": "serendipity", "definition": "The occurrence of events by chance in a happy way.", ' \
+           '"translation": "sérendipité", "example1": "Finding this café was pure serendipity.", ' \
+           '"example2": "Serendipity led them to the discovery."}'
+    found = {}
+    for start in range(0, len(text), 7):
+        completed = parser.feed(text[start:start + 7])
+        assert not set(completed) & set(found)
+        found.update(completed)
+    assert found == COMPLETE
+
+
+def test_stream_parser_waits_for_the_closing_quote():
+    parser = FieldStreamParser()
+    assert parser.feed('{"word": "ser') == {}
+    assert parser.feed('endipity", "def') == {'word': 'serendipity'}
@@ -0,0 +1,44 @@
+import requests
+
+from conftest import sign_in
+from utils.firebase_simple_config import FirebaseSimpleManager
+from utils.http_transport import HttpTransport
+from utils.word_cache import DetailCache, WordCache
+
+USER_ID = 'u1'
+
+
+def make_manager(url):
+    sign_in(USER_ID)
+    transport = HttpTransport(max_retries=0)
+    manager = FirebaseSimpleManager(transport=transport, word_cache=WordCache(), detail_cache=DetailCache(),
+                                    database_url=url)
+    for word in ('cat', 'dog'):
+        transport.request('PUT', f"{url}/word_details/{USER_ID}/{word}.json", json={'definition': f"{word} definition"})
+    return manager, transport
+
+
+def test_missing_details_are_fetched(emulator):
+    manager, _ = make_manager(emulator)
+    words = manager.get_words_details([{'word': 'cat'}, {'word': 'dog'}, {'word': 'owl'}])
+    assert [word['definition'] for word in words] == ['cat definition', 'dog definition', '']
+
+
+def test_detail_fetches_recover_from_an_expired_token(emulator):
+    manager, transport = make_manager(emulator)
+    send = transport.session.request
+    refused = set()
+
+    def request(method, url, **kwargs):
+        if 'word_details' in url and url not in refused:
+            refused.add(url)
+            response = requests.Response()
+            response.status_code, response._content = 401, b'{"error": "Auth token is expired"}'
+            return response
+        return send(method, url, **kwargs)
+
+    transport.session.request = request
+    manager._recover_from_unauthorized = lambda: True
+
+    words = manager.get_words_details([{'word': 'cat'}, {'word': 'dog'}])
+    assert [word['definition'] for word in words] == ['cat definition', 'dog definition']
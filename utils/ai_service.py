@@ -1,84 +1,332 @@
 import requests
 import json
 import os
-import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from dotenv import load_dotenv
 from huggingface_hub import InferenceClient
+from .definition_cache import get_definition_cache
+from .firebase_simple_config import normalize_word
+from .instrumentation import cache_event, instrumented, span
+from .rate_limit import AI_MAX_CONCURRENCY, get_ai_limiter
+from .response_parser import (
+    FieldStreamParser, WORD_FIELDS, load_json_lenient, normalize_word_fields, parse_word_response
+)
 
 # Load environment variables
 load_dotenv()
 # Ensure the Hugging Face token is set
 HF_TOKEN = os.getenv('HUGGINGFACE_TOKEN', '').strip()   
 
+MODEL_ID = "HuggingFaceH4/zephyr-7b-beta"
+# Bump when the lookup prompt changes, so cached answers to the old one are not served
+PROMPT_VERSION = 2
+
+# Completion budget of one lookup: a complete answer takes about 120 tokens
+LOOKUP_MAX_TOKENS = 200
+
+# Words sent in one batched lookup, and the completion budget allowed for each
+BATCH_MAX_WORDS = 10
+BATCH_TOKENS_PER_WORD = 160
+
+# Sent once after an answer that could not be fully parsed
+RETRY_INSTRUCTION = (
+    'Your answer was not a complete JSON object. Reply again with only the JSON object, '
+    'with the keys word, definition, translation, example1, example2 and double-quoted strings.'
+)
+
 # Initialize 
 client = InferenceClient(
-    model="HuggingFaceH4/zephyr-7b-beta",
+    model=MODEL_ID,
     api_key=HF_TOKEN  # ou api_key=HF_TOKEN si version plus récente de huggingface_hub
 )
 
+
+def create_completion(name, **kwargs):
+    """Call the chat completion API within the process-wide rate limit and concurrency cap"""
+    with get_ai_limiter().slot():
+        with span(name, kind='http') as call:
+            response = client.chat.completions.create(**kwargs)
+            if response.choices and response.choices[0].message:
+                call['bytes'] = len((response.choices[0].message.content or '').encode('utf-8'))
+            return response
+
+
+def stream_completion(name, **kwargs):
+    """Like create_completion, but yields the answer's text as it is generated"""
+    with get_ai_limiter().slot():
+        with span(name, kind='http') as call:
+            start = time.perf_counter()
+            call['bytes'] = 0
+            for chunk in client.chat.completions.create(stream=True, **kwargs):
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                call.setdefault('first_token_ms', round((time.perf_counter() - start) * 1000, 1))
+                call['bytes'] += len(delta.encode('utf-8'))
+                yield delta
+
+
+class EnrichmentPool:
+    """Worker threads running lookups for every session of the process.
+
+    The rate limiter decides how fast they reach the provider; the pool only
+    lets a caller fan out several lookups and collect them in order.
+    """
+
+    def __init__(self, max_workers=AI_MAX_CONCURRENCY):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ai-enrichment")
+        self._worker = threading.local()
+
+    def submit(self, fn, *args):
+        ctx = get_script_run_ctx()
+
+        def run():
+            self._worker.active = True
+            if ctx:
+                add_script_run_ctx(threading.current_thread(), ctx)
+            return fn(*args)
+
+        return self._pool.submit(run)
+
+    def map(self, fn, items):
+        """Return [fn(item) for item in items], computed concurrently."""
+        items = list(items)
+        if len(items) < 2 or getattr(self._worker, 'active', False):
+            # Waiting on the pool from one of its own workers could deadlock
+            return [fn(item) for item in items]
+        return [future.result() for future in [self.submit(fn, item) for item in items]]
+
+
+@st.cache_resource
+def get_enrichment_pool():
+    return EnrichmentPool()
+
+
+def get_definitions_concurrently(words):
+    """Look up words one by one in parallel, within the shared rate limit; results are in order"""
+    return get_enrichment_pool().map(get_definition_and_examples, words)
+
+@instrumented('ai.get_definition_and_examples')
 def get_definition_and_examples(word):
     """ Get definition, translation, and examples for an English word using Mistral-Nemo-Instruct-2407
+    Words already looked up by any user are served from the shared definition cache.
     """
+    cached = get_definition_cache().get(MODEL_ID, PROMPT_VERSION, word)
+    cache_event('definition_cache', cached is not None)
+    if cached is not None:
+        return cached
+
     if not HF_TOKEN:
         print("Token Hugging Face manquant. Veuillez configurer votre clé API.")
         return create_fallback_response(word)
-    
-    messages = [
+
+    try:
+        response = create_completion(
+            "hf chat.completions",
+            model=MODEL_ID,
+            messages=lookup_messages(word),
+            max_tokens=LOOKUP_MAX_TOKENS,
+            temperature=0.1,
+        )
+        text = response.choices[0].message.content
+        word_data, complete = parse_lookup_response(text, word)
+        return word_data if complete else retry_lookup(word, text, word_data)
+
+    except Exception as e:
+        print(f"Erreur lors de l'appel au modèle : {str(e)}")
+        return create_fallback_response(word)
+
+
+def stream_definition_and_examples(word):
+    """ Same lookup as get_definition_and_examples, streamed
+    Yields the fields written so far (a growing dict) each time the model
+    completes one; the last value yielded is the full result.
+    """
+    cached = get_definition_cache().get(MODEL_ID, PROMPT_VERSION, word)
+    cache_event('definition_cache', cached is not None)
+    if cached is not None:
+        yield cached
+        return
+
+    if not HF_TOKEN:
+        print("Token Hugging Face manquant. Veuillez configurer votre clé API.")
+        yield create_fallback_response(word)
+        return
+
+    parser = FieldStreamParser()
+    fields = {}
+    text = ''
+    try:
+        for delta in stream_completion(
+            "hf chat.completions (stream)",
+            model=MODEL_ID,
+            messages=lookup_messages(word),
+            max_tokens=LOOKUP_MAX_TOKENS,
+            temperature=0.1,
+        ):
+            text += delta
+            completed = parser.feed(delta)
+            if completed:
+                fields.update(completed)
+                yield dict(fields)
+    except Exception as e:
+        print(f"Erreur lors de l'appel au modèle : {str(e)}")
+        yield create_fallback_response(word)
+        return
+
+    word_data, complete = parse_lookup_response(text, word)
+    yield word_data if complete else retry_lookup(word, text, word_data)
+
+
+def lookup_messages(word):
+    return [
         {"role": "system", "content": "You are an English assistant."},
         {"role": "user", "content": (
             f'Provide a definition, French translation, and two English example sentences for the word '
             f'{word}. The two examples should contain the word in different contexts and always be in English.'
-            f'Format the response as JSON with keys: word, definition, translation, example1, example2.'
+            f'Format the response as JSON with keys: word, definition, translation, example1, example2. '
+            f'Reply with the JSON object only.'
         )}
     ]
 
+
+def parse_lookup_response(text, word):
+    """
+    Turn the model's answer into word data, repairing it if needed; returns
+    (word_data, complete). Fields that could not be recovered are left empty
+    and only complete answers go to the shared cache.
+    """
+    fields = parse_word_response(text)
+    word_data = {field: fields.get(field, '') for field in WORD_FIELDS}
+    word_data['word'] = word_data['word'] or word
+    complete = validate_word_data(word_data)
+    if complete:
+        get_definition_cache().put(MODEL_ID, PROMPT_VERSION, word, word_data)
+    return word_data, complete
+
+
+def retry_lookup(word, text, partial):
+    """
+    Ask once more after an incomplete answer; if that fails too, keep the
+    fields found in either answer rather than inventing placeholders
+    """
+    messages = lookup_messages(word) + [
+        {"role": "assistant", "content": text},
+        {"role": "user", "content": RETRY_INSTRUCTION},
+    ]
     try:
-        response = client.chat.completions.create(
-            model="HuggingFaceH4/zephyr-7b-beta",
+        response = create_completion(
+            "hf chat.completions (retry)",
+            model=MODEL_ID,
             messages=messages,
-            max_tokens=300,
+            max_tokens=LOOKUP_MAX_TOKENS,
             temperature=0.1,
         )
-        text = response.choices[0].message.content
+        word_data, complete = parse_lookup_response(response.choices[0].message.content, word)
+    except Exception as e:
+        print(f"Erreur lors de la nouvelle tentative : {str(e)}")
+        return partial
+    if complete:
+        return word_data
+    return {field: word_data[field] or partial[field] for field in WORD_FIELDS}
 
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            return extract_info_manually(text, word)
 
-    except Exception as e:
-        print(f"Erreur lors de l'appel au modèle : {str(e)}")
-        return create_fallback_response(word)
+@instrumented('ai.get_definitions_batch')
+def get_definitions_batch(words):
+    """ Get definitions for several words with a single model call, in the same order
+    Cached words are not sent; answers missing from the reply or failing
+    validate_word_data are looked up again one word at a time.
+    """
+    cache = get_definition_cache()
+    results = [cache.get(MODEL_ID, PROMPT_VERSION, word) for word in words]
+    missing = [word for word, result in zip(words, results) if result is None]
+    cache_event('definition_cache', not missing)
+
+    answers = {}
+    if missing and HF_TOKEN:
+        batches = [missing[start:start + BATCH_MAX_WORDS] for start in range(0, len(missing), BATCH_MAX_WORDS)]
+        for batch_answers in get_enrichment_pool().map(request_definitions_batch, batches):
+            answers.update(batch_answers)
+
+    retry = []
+    for index, word in enumerate(words):
+        if results[index] is not None:
+            continue
+        word_data = answers.get(normalize_word(word))
+        if word_data is not None:
+            cache.put(MODEL_ID, PROMPT_VERSION, word, word_data)
+            results[index] = word_data
+        else:
+            retry.append(index)
+
+    for index, word_data in zip(retry, get_definitions_concurrently([words[index] for index in retry])):
+        results[index] = word_data
+    return results
 
 
-def extract_info_manually(text, word):
+def request_definitions_batch(words):
     """
-    Extract information manually from generated text if JSON parsing fails
+    Ask the model for a JSON array describing `words`; returns the valid
+    elements keyed by normalized word (an empty dict if the call failed)
     """
+    listed = ', '.join(json.dumps(word) for word in words)
+    messages = [
+        {"role": "system", "content": "You are an English assistant. Always respond with a valid JSON array only."},
+        {"role": "user", "content": (
+            f'For each of these English words or expressions: {listed}, provide a definition, a French '
+            f'translation and two English example sentences using it in different contexts. '
+            f'Format the response as a JSON array with one object per word, in the same order, '
+            f'with keys: word, definition, translation, example1, example2. Reply with the JSON array only.'
+        )}
+    ]
+
     try:
-        # Try to extract key information using regex
-        definition_pattern = r'[Dd]efinition[:\s]*([^.\n]+)'
-        translation_pattern = r'[Tt]ranslation[:\s]*([^.\n]+)'
-        example_pattern = r'[Ee]xample[^:]*:[^"]*"([^"]+)"'
-        
-        definition_match = re.search(definition_pattern, text)
-        translation_match = re.search(translation_pattern, text)
-        example_matches = re.findall(example_pattern, text)
-        
-        result = {
-            'word': word,
-            'definition': definition_match.group(1).strip() if definition_match else f"Definition for {word}",
-            'translation': translation_match.group(1).strip() if translation_match else f"Traduction de {word}",
-            'example1': example_matches[0] if len(example_matches) > 0 else f"Example sentence with {word}.",
-            'example2': example_matches[1] if len(example_matches) > 1 else f"Another example with {word}."
-        }
-        
-        return result
-        
+        response = create_completion(
+            f"hf chat.completions (batch of {len(words)})",
+            model=MODEL_ID,
+            messages=messages,
+            max_tokens=BATCH_TOKENS_PER_WORD * len(words),
+            temperature=0.1,
+        )
+        text = response.choices[0].message.content
     except Exception as e:
-        print(f"Manual extraction failed: {str(e)}")
-        return create_fallback_response(word)
+        print(f"Erreur lors de l'appel groupé au modèle : {str(e)}")
+        return {}
+
+    items = load_json_lenient(text, '[')
+    items = items if isinstance(items, list) else []
+    answers = {}
+    requested = {normalize_word(word): word for word in words}
+    # Order is only trusted when nothing was dropped or added
+    aligned = len(items) == len(words)
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        item = normalize_word_fields(item)
+        key = normalize_word(item.get('word', ''))
+        if key not in requested and aligned and words_match(key, normalize_word(words[index])):
+            # The model reworded the word slightly ("to break the ice" for "break the ice")
+            key = normalize_word(words[index])
+        item['word'] = requested.get(key, '')
+        if key in requested and validate_word_data(item):
+            answers[key] = item
+    return answers
+
+
+def words_match(answered, requested):
+    """Whether the word echoed in an answer is a rewording of the requested one (both normalized)."""
+    if not answered or not requested:
+        return False
+    if f' {requested} ' in f' {answered} ':
+        # Requested word kept whole, e.g. with an article or "to" added
+        return True
+    return SequenceMatcher(None, answered, requested).ratio() >= 0.8
+
 
 def create_fallback_response(word):
     """
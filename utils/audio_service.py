@@ -4,6 +4,7 @@ import io
 import base64
 import os
 import tempfile
+from .instrumentation import span
 
 def text_to_speech(text, lang='en'):
     """
@@ -13,8 +14,10 @@ def text_to_speech(text, lang='en'):
         # Create a temporary file for the audio
         with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as tmp_file:
             # Generate speech
-            tts = gTTS(text=text, lang=lang, slow=False)
-            tts.save(tmp_file.name)
+            with span("gtts", kind='http') as call:
+                tts = gTTS(text=text, lang=lang, slow=False)
+                tts.save(tmp_file.name)
+                call['bytes'] = os.path.getsize(tmp_file.name)
             
             # Read the audio file
             with open(tmp_file.name, 'rb') as audio_file:
@@ -0,0 +1,184 @@
+"""
+Background writes for VocabMaster
+Saving a word or a game result is dispatched to a worker thread so the page
+moves on at once. Outcomes are reported on a later run with a toast; failed
+writes stay listed in the sidebar with a retry button.
+With the local mirror enabled, writes waiting in its outbox and those the
+server refused are listed in the sidebar too.
+"""
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from dotenv import load_dotenv
+from .firebase_auth import get_current_user
+from .local_mirror import ADD_WORDS, PUT_IF_ABSENT, RECORD_GAME_RESULT, get_local_mirror
+
+# Load environment variables
+load_dotenv()
+BACKGROUND_WRITE_WORKERS = int(os.getenv('BACKGROUND_WRITE_WORKERS', '4'))
+
+# Seconds between checks for finished writes while some are still running
+REPORT_INTERVAL = 1.0
+
+
+class BackgroundWriter:
+    """Thread pool running writes with the submitting session's script context.
+
+    The context gives the worker access to the session state (auth token and
+    its refresh); the outcome methods it runs never write to the page.
+    """
+
+    def __init__(self, max_workers=BACKGROUND_WRITE_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="background-write")
+
+    def submit(self, fn, *args):
+        ctx = get_script_run_ctx()
+
+        def run():
+            if ctx:
+                add_script_run_ctx(threading.current_thread(), ctx)
+            return fn(*args)
+
+        return self._pool.submit(run)
+
+
+@st.cache_resource
+def get_background_writer():
+    return BackgroundWriter()
+
+
+def submit_write(label, fn, *args):
+    """Run `fn(*args)` in the background; it must return (status, message).
+
+    `label` names the write in toasts, e.g. "'serendipity' ajouté à vos mots".
+    """
+    writes = st.session_state.setdefault('background_writes', {})
+    write_id = str(uuid.uuid4())
+    writes[write_id] = {
+        'label': label,
+        'fn': fn,
+        'args': args,
+        'future': get_background_writer().submit(fn, *args),
+        'error': None,
+    }
+    return write_id
+
+
+def has_pending_writes():
+    return any(not write['future'].done() for write in st.session_state.get('background_writes', {}).values())
+
+
+def _collect_finished_writes():
+    """Toast finished writes; returns True if any of them failed."""
+    writes = st.session_state.get('background_writes', {})
+    failed = False
+    for write_id, write in list(writes.items()):
+        if write['error'] or not write['future'].done():
+            continue
+        try:
+            status, message = write['future'].result()
+        except Exception as e:
+            status, message = 'error', str(e)
+
+        if status == 'error':
+            # Kept until retried or dismissed
+            write['error'] = message or "Erreur inconnue"
+            st.toast(f"❌ Échec : {write['label']}")
+            failed = True
+            continue
+        del writes[write_id]
+        if message:
+            st.toast(f"⚠️ {message}")
+        else:
+            st.toast(f"✅ {write['label']}")
+    return failed
+
+
+def _show_failed_writes():
+    writes = st.session_state.get('background_writes', {})
+    failed = {write_id: write for write_id, write in writes.items() if write['error']}
+    if not failed:
+        return
+    st.markdown("### ⚠️ Sauvegardes en échec")
+    for write_id, write in failed.items():
+        st.warning(f"{write['label']} : {write['error']}")
+        col_retry, col_dismiss = st.columns(2)
+        with col_retry:
+            if st.button("🔁 Réessayer", key=f"retry_{write_id}", use_container_width=True):
+                del writes[write_id]
+                submit_write(write['label'], write['fn'], *write['args'])
+                st.rerun()
+        with col_dismiss:
+            if st.button("✖️ Ignorer", key=f"dismiss_{write_id}", use_container_width=True):
+                del writes[write_id]
+                st.rerun()
+
+
+def _describe_operation(op):
+    body = op['body'] or {}
+    if op['method'] == PUT_IF_ABSENT:
+        return f"Ajout du mot '{body.get('record', {}).get('word', '')}'"
+    if op['method'] == ADD_WORDS:
+        return f"Ajout de {len(body.get('records', {}))} mot(s)"
+    if op['method'] == RECORD_GAME_RESULT or op['path'].startswith('game_results/'):
+        return "Résultat de partie"
+    return f"{op['method']} {op['path']}"
+
+
+def _show_outbox():
+    """Hand this session's tokens to the outbox flusher and show what it still holds."""
+    mirror = get_local_mirror()
+    user = get_current_user()
+    if not mirror or not user:
+        return
+    user_id = user.get('user_id') or user.get('email')
+    # Tokens only live in memory: after a restart, queued writes resume once the user is back
+    mirror.flusher.remember_credentials(
+        user_id, st.session_state.get('auth_token'), st.session_state.get('refresh_token')
+    )
+
+    pending = mirror.pending_count(user_id)
+    if pending:
+        st.caption(f"⏳ {pending} modification(s) en attente de synchronisation")
+
+    failed = mirror.failed_operations(user_id)
+    if not failed:
+        return
+    st.markdown("### ⚠️ Synchronisation refusée")
+    for op in failed:
+        st.warning(f"{_describe_operation(op)} : {op['last_error']}")
+        col_retry, col_dismiss = st.columns(2)
+        with col_retry:
+            if st.button("🔁 Réessayer", key=f"retry_outbox_{op['id']}", use_container_width=True):
+                mirror.retry_failed(op['id'])
+                st.rerun()
+        with col_dismiss:
+            if st.button("✖️ Ignorer", key=f"dismiss_outbox_{op['id']}", use_container_width=True,
+                         help="La modification reste sur cet appareil mais ne sera pas envoyée"):
+                mirror.mark_done(op['id'])
+                st.rerun()
+
+
+def report_writes():
+    """Toast writes that finished since the last run and list failed ones in the sidebar.
+
+    While writes are running, a fragment polls for them so their outcome
+    shows up without waiting for the next interaction. Every page calls this
+    on load, which also keeps the outbox flusher's credentials current.
+    """
+    _collect_finished_writes()
+    with st.sidebar:
+        _show_failed_writes()
+        _show_outbox()
+
+    if has_pending_writes():
+        @st.fragment(run_every=REPORT_INTERVAL)
+        def poll_writes():
+            if _collect_finished_writes():
+                # The sidebar list of failed writes belongs to the full page
+                st.rerun()
+
+        poll_writes()
@@ -0,0 +1,225 @@
+"""
+Bulk import of vocabulary lists (CSV, TSV or Anki plain-text export)
+The file is read as a stream and handled in chunks: rows already in the
+user's list are skipped, missing definitions are generated concurrently by
+the AI service's shared, rate-limited pool, and each chunk is saved with a
+single add_words call.
+Progress is reported after every chunk so an interrupted import can resume.
+
+Command line usage:
+    python -m utils.bulk_import vocabulary.csv --email you@example.com [--no-ai]
+"""
+import argparse
+import csv
+import getpass
+import html
+import itertools
+import json
+import os
+import re
+from dotenv import load_dotenv
+from .ai_service import get_definition_and_examples, get_enrichment_pool
+from .firebase_simple_config import word_key
+
+# Load environment variables
+load_dotenv()
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '100'))
+
+FIELDS = ('word', 'translation', 'definition', 'example1', 'example2')
+
+# Header names recognised for each field (compared lower-cased)
+COLUMN_ALIASES = {
+    'word': {'word', 'mot', 'front', 'recto', 'term', 'english', 'anglais'},
+    'translation': {'translation', 'traduction', 'back', 'verso', 'meaning', 'french', 'français', 'francais'},
+    'definition': {'definition', 'définition'},
+    'example1': {'example1', 'example', 'example 1', 'exemple', 'exemple1', 'exemple 1'},
+    'example2': {'example2', 'example 2', 'exemple2', 'exemple 2'},
+}
+
+# Values of Anki's "#separator:" header
+ANKI_SEPARATORS = {'tab': '\t', 'comma': ',', 'semicolon': ';', 'pipe': '|', 'space': ' ', 'colon': ':'}
+
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def clean_cell(value, strip_html=False):
+    if strip_html:
+        value = html.unescape(_TAG_RE.sub(' ', value.replace('<br>', ' ')))
+    return ' '.join(value.split())
+
+
+def iter_import_rows(stream, filename=''):
+    """Yield {'word', 'translation', ...} dicts from a text stream, one per data row.
+
+    The delimiter comes from the file extension, Anki's `#separator:`
+    header or a sniff of the first line. A first row naming the columns is
+    used as a header; otherwise columns are read as word, translation,
+    definition, example1, example2.
+    """
+    delimiter = '\t' if filename.lower().endswith(('.tsv', '.txt')) else None
+    strip_html = False
+    columns = None
+    skipped_columns = set()
+
+    # Anki exports start with "#key:value" lines describing the file
+    line = stream.readline()
+    while line.startswith('#'):
+        key, _, value = line[1:].strip().partition(':')
+        key, value = key.strip().lower(), value.strip()
+        if key == 'separator':
+            delimiter = ANKI_SEPARATORS.get(value.lower(), value[:1] or delimiter)
+        elif key == 'html':
+            strip_html = value.lower() == 'true'
+        elif key == 'columns':
+            columns = value.split(delimiter or '\t')
+        elif key.endswith(' column') and value.isdigit():
+            # notetype / deck / tags columns are not vocabulary fields
+            skipped_columns.add(int(value) - 1)
+        line = stream.readline()
+
+    if delimiter is None:
+        delimiter = max(('\t', ';', ','), key=line.count)
+
+    reader = csv.reader(itertools.chain([line], stream), delimiter=delimiter)
+    mapping = _column_mapping(columns) if columns else None
+    for row in reader:
+        # Skipped columns are blanked rather than removed, so indexes match the `#columns:` header
+        row = ['' if index in skipped_columns else clean_cell(cell, strip_html) for index, cell in enumerate(row)]
+        if not any(row):
+            continue
+        if mapping is None:
+            mapping = _column_mapping(row)
+            if mapping:
+                # The first row was a header
+                continue
+            data_columns = (index for index in itertools.count() if index not in skipped_columns)
+            mapping = dict(zip(FIELDS, data_columns))
+        yield {field: row[index] if index < len(row) else '' for field, index in mapping.items()}
+
+
+def _column_mapping(header):
+    """Map fields to column indexes if `header` names the word column, else None."""
+    mapping = {}
+    for index, name in enumerate(header):
+        name = name.strip().lower()
+        for field, aliases in COLUMN_ALIASES.items():
+            if name in aliases and field not in mapping:
+                mapping[field] = index
+    return mapping if 'word' in mapping else None
+
+
+def enrich_row(row):
+    """Fill in what the file did not provide from the AI service; the file's values win."""
+    generated = get_definition_and_examples(row['word']) or {}
+    enriched = {field: row.get(field) or generated.get(field, '') for field in FIELDS}
+    enriched['word'] = row['word']
+    return enriched
+
+
+def needs_enrichment(row):
+    return not (row.get('translation') and row.get('definition'))
+
+
+def import_words(manager, rows, start_at=0, enrich=True, chunk_size=IMPORT_CHUNK_SIZE, on_chunk=None):
+    """Import rows for the current user; returns the totals.
+
+    `start_at` skips rows committed by a previous run. After each chunk is
+    saved, `on_chunk(position, totals)` receives the number of rows handled
+    so far, which is the value to resume from. The import stops at the
+    first chunk that could not be saved, leaving `position` before it.
+    """
+    totals = {'added': 0, 'duplicate': 0, 'invalid': 0, 'error': 0, 'position': start_at, 'completed': False}
+    # Only keys are kept, so memory grows with the vocabulary, not with the file
+    known_keys = {word_key(word.get('word', '')) for word in manager.get_all_words()}
+
+    rows = itertools.islice(rows, start_at, None)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        to_save = []
+        for row in chunk:
+            key = word_key(row.get('word', ''))
+            if not key:
+                totals['invalid'] += 1
+            elif key in known_keys:
+                totals['duplicate'] += 1
+            else:
+                known_keys.add(key)
+                to_save.append(row)
+
+        if enrich:
+            to_save = get_enrichment_pool().map(
+                lambda row: enrich_row(row) if needs_enrichment(row) else row, to_save
+            )
+
+        outcomes = manager.add_words(to_save) if to_save else []
+        statuses = [outcome['status'] for outcome in outcomes]
+        if 'error' in statuses:
+            totals['error'] += statuses.count('error')
+            return totals
+        for status in statuses:
+            totals[status] += 1
+        totals['position'] += len(chunk)
+        if on_chunk:
+            on_chunk(totals['position'], totals)
+
+    totals['completed'] = True
+    return totals
+
+
+def file_fingerprint(name, size):
+    """Identify an input file so a checkpoint is only reused for the same file."""
+    return f"{os.path.basename(name)}:{size}"
+
+
+def main():
+    from .firebase_auth import FirebaseAuth, init_auth_session, login_user
+    from .http_transport import get_transport
+    from .storage import create_data_manager
+
+    parser = argparse.ArgumentParser(description="Importer une liste de vocabulaire (CSV, TSV, export Anki)")
+    parser.add_argument('path')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--no-ai', action='store_true', help="Ne pas compléter les champs manquants avec l'IA")
+    parser.add_argument('--checkpoint', help="Fichier de reprise (par défaut: <fichier>.import.json)")
+    parser.add_argument('--restart', action='store_true', help="Ignorer le point de reprise existant")
+    args = parser.parse_args()
+
+    password = os.getenv('VOCABMASTER_PASSWORD') or getpass.getpass("Mot de passe: ")
+    init_auth_session()
+    result = FirebaseAuth(transport=get_transport()).sign_in_with_email(args.email, password)
+    if not result.get('success'):
+        raise SystemExit(f"Connexion impossible: {result.get('error')}")
+    login_user(result)
+    manager = create_data_manager(transport=get_transport())
+
+    checkpoint_path = args.checkpoint or f"{args.path}.import.json"
+    fingerprint = file_fingerprint(args.path, os.path.getsize(args.path))
+    start_at = 0
+    if not args.restart and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('fingerprint') == fingerprint and checkpoint.get('user_id') == result.get('user_id'):
+            start_at = checkpoint.get('position', 0)
+            print(f"Reprise après {start_at} lignes")
+
+    def save_checkpoint(position, totals):
+        with open(checkpoint_path, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': fingerprint, 'user_id': result.get('user_id'), 'position': position}, f)
+        print(f"{position} lignes traitées - {totals['added']} ajoutés, {totals['duplicate']} doublons")
+
+    with open(args.path, encoding='utf-8-sig', newline='') as stream:
+        totals = import_words(manager, iter_import_rows(stream, args.path), start_at=start_at,
+                              enrich=not args.no_ai, on_chunk=save_checkpoint)
+
+    if not totals['completed']:
+        raise SystemExit(f"Import interrompu après {totals['position']} lignes; relancez la commande pour reprendre.")
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    print(f"Import terminé: {totals['added']} ajoutés, {totals['duplicate']} doublons, {totals['invalid']} invalides")
+
+
+if __name__ == '__main__':
+    main()
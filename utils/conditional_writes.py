@@ -0,0 +1,46 @@
+"""
+Conditional creates on the Realtime Database
+A word is created with an `if-match` PUT against the ETag of the empty node,
+so two sessions saving the same word cannot both win. Such a PUT is not
+safe to replay blindly: if the first attempt landed but its response was
+lost, the replay fails with 412 and the word would look like a duplicate of
+itself. Records carry a unique `id`, which tells ours apart from another
+session's.
+"""
+import requests
+
+# PUT attempts before the last transport error is raised
+MAX_CREATE_ATTEMPTS = 3
+
+
+def is_own_record(value, record):
+    """Whether the node's value is `record` itself, saved by an earlier attempt."""
+    return isinstance(value, dict) and value.get('id') is not None and value.get('id') == record.get('id')
+
+
+def create_if_absent(send, record, etag, max_attempts=MAX_CREATE_ATTEMPTS):
+    """PUT `record` if the node still has `etag`; returns the HTTP status.
+
+    `send(method, **kwargs)` performs a request against the node. 200 means
+    the record is stored (possibly by an attempt whose response was lost),
+    412 that another record holds the node.
+    """
+    error = None
+    for _ in range(max_attempts):
+        try:
+            response = send("PUT", json=record, headers={'if-match': etag}, idempotent=False)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        else:
+            if response.status_code != 412 or error is None:
+                return response.status_code
+
+        # An earlier attempt may have landed: look at what the node holds now
+        current = send("GET", headers={'X-Firebase-ETag': 'true'})
+        if current.status_code != 200:
+            return current.status_code
+        value = current.json()
+        if value is not None:
+            return 200 if is_own_record(value, record) else 412
+        etag = current.headers.get('ETag', '')
+    raise error
@@ -0,0 +1,139 @@
+"""
+Page-facing data manager shared by every storage backend
+Pages only talk to a DataManager. The parts that do not depend on where the
+data lives (the stored documents, page messages around write outcomes and
+reads derived from other reads) are implemented here once;
+FirebaseSimpleManager and StorageManager provide the data operations.
+"""
+import random
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+import streamlit as st
+from .firebase_auth import get_current_user
+
+
+class DataManager(ABC):
+    def _signed_in_user_id(self):
+        """Current user's id, or None when nobody is signed in; writes nothing to the page."""
+        user = get_current_user()
+        if not user:
+            return None
+        return user.get('user_id') or user.get('email')
+
+    def _user_id(self):
+        """Current user's id, or None after reporting that nobody is signed in."""
+        user_id = self._signed_in_user_id()
+        if not user_id:
+            st.error("Utilisateur non authentifié.")
+        return user_id
+
+    def _build_word_doc(self, word_data, user_id):
+        """Prepare the record stored for a word"""
+        return {
+            'word': word_data.get('word', ''),
+            'translation': word_data.get('translation', ''),
+            'definition': word_data.get('definition', ''),
+            'example1': word_data.get('example1', ''),
+            'example2': word_data.get('example2', ''),
+            'created_at': datetime.now().isoformat(),
+            'id': str(uuid.uuid4()),
+            'user_id': user_id
+        }
+
+    def _build_game_doc(self, score, total_questions, user_id):
+        """Prepare the record stored for a finished game"""
+        return {
+            'score': score,
+            'total_questions': total_questions,
+            'percentage': (score / total_questions) * 100,
+            'played_at': datetime.now().isoformat(),
+            'id': str(uuid.uuid4()),
+            'user_id': user_id
+        }
+
+    @abstractmethod
+    def add_word_outcome(self, word_data):
+        """Add a word without writing to the page; returns (status, message)
+
+        status is 'added', 'duplicate', 'invalid' or 'error'.
+        """
+
+    @abstractmethod
+    def add_words(self, words_data):
+        """Add several words; returns [{'word', 'status'}] in input order"""
+
+    @abstractmethod
+    def get_all_words(self):
+        """Retrieve all words for the current user, newest first"""
+
+    @abstractmethod
+    def get_words_page(self, cursor=None, limit=20, order='desc'):
+        """Get one page of the current user's words: {'words': [...], 'next_cursor': ...}"""
+
+    @abstractmethod
+    def get_words_details(self, words):
+        """Return full records for listed words (index projections), in the same order"""
+
+    @abstractmethod
+    def save_game_outcome(self, score, total_questions):
+        """Save a game result without writing to the page; returns ('saved' or 'error', message)"""
+
+    @abstractmethod
+    def get_game_stats(self):
+        """Get game statistics for current user"""
+
+    @abstractmethod
+    def get_total_words_count(self):
+        """Get total number of words for current user"""
+
+    @abstractmethod
+    def get_monthly_progress(self):
+        """Get monthly learning progress for current user"""
+
+    def add_word(self, word_data):
+        """Add a new word for the current user"""
+        status, message = self.add_word_outcome(word_data)
+        if status == 'duplicate':
+            st.warning(message)
+        elif message:
+            st.error(message)
+        return status == 'added'
+
+    def get_word_details(self, word):
+        """Return the full record of a listed word, with its definition and examples"""
+        return self.get_words_details([word])[0]
+
+    def get_random_words(self, count=10):
+        """Get random words for quiz (for current user)"""
+        try:
+            all_words = self.get_all_words()
+            if len(all_words) < count:
+                st.warning(f"Vous n'avez pas assez de mots pour jouer (minimum {count}).")
+                return []
+            return random.sample(all_words, count)
+        except Exception as e:
+            st.error(f"Erreur lors de la sélection aléatoire: {str(e)}")
+            return []
+
+    def save_game_result(self, score, total_questions):
+        """Save game result for current user"""
+        status, message = self.save_game_outcome(score, total_questions)
+        if message:
+            st.error(message)
+        return status == 'saved'
+
+    def get_total_games_count(self):
+        """Get total number of games played for current user"""
+        try:
+            return self.get_game_stats()['total_games']
+        except Exception:
+            return 0
+
+    def get_best_score(self):
+        """Get best score for current user"""
+        try:
+            stats = self.get_game_stats()
+            return round(stats['best_score'], 1) if stats['best_score'] else None
+        except Exception:
+            return None
@@ -0,0 +1,103 @@
+"""
+Shared cache of generated word definitions
+A lookup already answered by the model, for any user, is served again from
+an in-memory LRU or from an SQLite file that survives restarts and is shared
+by every process pointing at it. Entries are keyed by normalized word, model
+and prompt version, so changing either one starts a fresh set of answers.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import streamlit as st
+from dotenv import load_dotenv
+from .firebase_simple_config import normalize_word
+
+# Load environment variables
+load_dotenv()
+DEFINITION_CACHE_PATH = os.getenv('DEFINITION_CACHE_PATH', 'definitions.db')
+DEFINITION_CACHE_SIZE = int(os.getenv('DEFINITION_CACHE_SIZE', '2000'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS definitions (
+    model TEXT NOT NULL,
+    prompt_version INTEGER NOT NULL,
+    word TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (model, prompt_version, word)
+);
+"""
+
+
+class DefinitionCache:
+    def __init__(self, path=DEFINITION_CACHE_PATH, max_entries=DEFINITION_CACHE_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if self.path:
+            self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        """One connection per thread; WAL lets other processes read while one writes."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, model, prompt_version, word):
+        """Return the cached answer for a lookup, or None."""
+        key = (model, prompt_version, normalize_word(word))
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return dict(data)
+        if not self.path:
+            return None
+
+        row = self._conn().execute(
+            "SELECT data FROM definitions WHERE model = ? AND prompt_version = ? AND word = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+        data = json.loads(row[0])
+        self._remember(key, data)
+        return dict(data)
+
+    def put(self, model, prompt_version, word, data):
+        """Store a validated answer; placeholders must never be cached."""
+        key = (model, prompt_version, normalize_word(word))
+        self._remember(key, dict(data))
+        if self.path:
+            conn = self._conn()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO definitions (model, prompt_version, word, data, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (*key, json.dumps(data, ensure_ascii=False), time.time())
+                )
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+@st.cache_resource
+def get_definition_cache():
+    """Single cache per process; the SQLite file is shared between processes."""
+    try:
+        return DefinitionCache()
+    except sqlite3.Error as e:
+        print(f"Cache des définitions sur disque indisponible : {str(e)}")
+        return DefinitionCache(path=None)
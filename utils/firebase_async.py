@@ -0,0 +1,172 @@
+"""
+Asynchronous Firebase reads for VocabMaster
+Independent reads run concurrently, so a page waits for its slowest request
+instead of the sum of all of them.
+"""
+import asyncio
+import json
+import threading
+import time
+from urllib.parse import quote
+import httpx
+import streamlit as st
+from .firebase_auth import get_current_user
+from .firebase_simple_config import FirebaseSimpleManager, user_path, words_sync_params
+from .game_stats import summarize_game_stats
+from .http_transport import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_POOL_SIZE, call_name
+from .instrumentation import record
+from .json_stream import aiter_children
+from .single_flight import AsyncSingleFlight
+from .word_stats import is_complete, monthly_series, needs_rebuild
+
+
+class NeedsSyncPath(Exception):
+    """The async fast path cannot answer; the sync manager has to handle the call."""
+
+
+class AsyncFirebaseManager:
+    """asyncio counterpart of FirebaseSimpleManager's read methods, for one user.
+
+    Shares the sync manager's word cache, so both see the same snapshots.
+    """
+
+    def __init__(self, manager, client, user_id, token, single_flight=None):
+        self._manager = manager
+        self._client = client
+        self._single_flight = single_flight or AsyncSingleFlight()
+        self._calls = []
+        self.user_id = user_id
+        self._token = token
+
+    async def _get(self, path, params=None, children=False):
+        """GET and parse a node; concurrent identical reads share one request.
+
+        With `children`, the node's children are collected into a dict as the
+        body is parsed, so a large node is never held as raw text.
+        """
+        url = f"{self._manager.database_url}/{quote(path)}.json"
+
+        async def fetch():
+            start = time.perf_counter()
+            request = self._client.build_request('GET', url, params={**(params or {}), 'auth': self._token})
+            response = await self._client.send(request, stream=True)
+            try:
+                if response.status_code != 200:
+                    raise NeedsSyncPath(f"HTTP {response.status_code}")
+                if children:
+                    return {key: value async for key, value in aiter_children(response)}
+                await response.aread()
+                return response.json()
+            finally:
+                await response.aclose()
+                # Runs on the loop thread: the page thread records it once the gather completes
+                self._calls.append({
+                    'name': call_name('GET', url) + ' (async)', 'kind': 'http', 'status': response.status_code,
+                    'bytes': response.num_bytes_downloaded,
+                    'duration_ms': round((time.perf_counter() - start) * 1000, 1),
+                })
+
+        return await self._single_flight.do((url, json.dumps(params, sort_keys=True), children), fetch)
+
+    async def _load_words(self):
+        word_cache = self._manager._word_cache
+        entry = word_cache.get(self.user_id)
+        if entry and word_cache.is_fresh(entry):
+            return entry['records']
+
+        fetched = await self._get(user_path("words", self.user_id), words_sync_params(entry), children=True)
+        records = self._manager._store_fetched_words(self.user_id, entry, fetched)
+        if records is None:
+            raise NeedsSyncPath("snapshot evicted during a delta sync")
+        return records
+
+    async def get_all_words(self):
+        word_list = list((await self._load_words()).values())
+        word_list.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+        return word_list
+
+    async def get_total_words_count(self):
+        word_cache = self._manager._word_cache
+        entry = word_cache.get(self.user_id)
+        if entry and word_cache.is_fresh(entry):
+            return len(entry['records'])
+
+        counters = await self._get(user_path("word_stats", self.user_id), {'shallow': 'true'})
+        if is_complete(counters) and isinstance(counters.get('total'), int):
+            return counters['total']
+        return len(await self._get(user_path("words", self.user_id), {'shallow': 'true'}) or {})
+
+    async def get_game_stats(self):
+        stats = await self._get(user_path("game_stats", self.user_id))
+        if stats is None:
+            raise NeedsSyncPath("game stats aggregate not built yet")
+        return summarize_game_stats(stats)
+
+    async def get_monthly_progress(self):
+        rollup = await self._get(user_path("word_stats", self.user_id))
+        if needs_rebuild(rollup):
+            raise NeedsSyncPath("word counters not built yet or due for a rebuild")
+        return monthly_series(rollup)
+
+
+class AsyncRunner:
+    """Event loop on a background thread with a pooled httpx client.
+
+    Keeping both alive across reruns lets every session reuse warm connections.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="firebase-async", daemon=True)
+        self._thread.start()
+        self.client = self.run(self._create_client())
+        # Lives on the loop's thread, shared by every session's reads
+        self.single_flight = AsyncSingleFlight()
+
+    async def _create_client(self):
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+        )
+
+    def run(self, coro):
+        """Run a coroutine on the background loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+
+@st.cache_resource
+def get_async_runner():
+    return AsyncRunner()
+
+
+def gather_reads(manager, *names):
+    """Call several read methods of `manager` concurrently; results come back in order.
+
+    `names` are FirebaseSimpleManager read methods, e.g. 'get_game_stats'.
+    Anything the async path cannot answer (local mirror, missing aggregates,
+    HTTP errors) is retried through the sync method, which takes care of
+    token refreshes, seeding and error messages.
+    """
+    if not isinstance(manager, FirebaseSimpleManager):
+        # Local storage backends answer without network round trips
+        return [getattr(manager, name)() for name in names]
+
+    user = get_current_user()
+    token = manager._get_token() if user else None
+    if not token or manager._mirror:
+        return [getattr(manager, name)() for name in names]
+
+    user_id = user.get('user_id') or user.get('email')
+    runner = get_async_runner()
+    reader = AsyncFirebaseManager(manager, runner.client, user_id, token, runner.single_flight)
+
+    async def gather():
+        return await asyncio.gather(*(getattr(reader, name)() for name in names), return_exceptions=True)
+
+    results = runner.run(gather())
+    for call in reader._calls:
+        record(call)
+    return [
+        getattr(manager, name)() if isinstance(result, Exception) else result
+        for name, result in zip(names, results)
+    ]
@@ -3,11 +3,13 @@ Firebase Authentication for VocabMaster
 Handles user authentication with Google OAuth and email/password
 """
 import streamlit as st
-import requests
+import base64
 import json
 import time
 import os
 from dotenv import load_dotenv
+from .http_transport import get_transport
+from .instrumentation import instrumented
 
 # Load environment variables
 load_dotenv()
@@ -16,12 +18,28 @@ load_dotenv()
 FIREBASE_AUTH_URL = "https://identitytoolkit.googleapis.com/v1/accounts"
 FIREBASE_API_KEY = os.getenv('FIREBASE_API_KEY')
 
+
+def get_token_expiry(token):
+    """Return the `exp` claim (epoch seconds) of a Firebase ID token, or 0 if unreadable.
+
+    The signature is not checked: the value is only used to schedule refreshes,
+    the database still validates every token it receives.
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(payload)).get('exp', 0))
+    except Exception:
+        return 0
+
 class FirebaseAuth:
-    def __init__(self):
+    def __init__(self, transport=None):
         self.api_key = FIREBASE_API_KEY
+        self._http = transport or get_transport()
         if not self.api_key:
             st.error("Firebase API Key manquante. Veuillez configurer FIREBASE_API_KEY.")
 
+    @instrumented('auth.sign_up_with_email')
     def sign_up_with_email(self, email, password, username):
         """Create a new user account with email and password"""
         url = f"{FIREBASE_AUTH_URL}:signUp?key={self.api_key}"
@@ -33,7 +51,7 @@ class FirebaseAuth:
         }
         
         try:
-            response = requests.post(url, json=payload)
+            response = self._http.post(url, json=payload)
             data = response.json()
             
             if response.status_code == 200:
@@ -57,6 +75,7 @@ class FirebaseAuth:
                 'error': f"Erreur de connexion: {str(e)}"
             }
     
+    @instrumented('auth.sign_in_with_email')
     def sign_in_with_email(self, email, password):
         """Sign in existing user with email and password"""
         url = f"{FIREBASE_AUTH_URL}:signInWithPassword?key={self.api_key}"
@@ -67,7 +86,7 @@ class FirebaseAuth:
         }
         
         try:
-            response = requests.post(url, json=payload)
+            response = self._http.post(url, json=payload, idempotent=True)
             data = response.json()
             
             if response.status_code == 200:
@@ -91,6 +110,7 @@ class FirebaseAuth:
                 'error': f"Erreur de connexion: {str(e)}"
             }
     
+    @instrumented('auth.refresh_token')
     def refresh_token(self, refresh_token):
         """Refresh the authentication token"""
         url = f"https://securetoken.googleapis.com/v1/token?key={self.api_key}"
@@ -100,7 +120,7 @@ class FirebaseAuth:
         }
         
         try:
-            response = requests.post(url, json=payload)
+            response = self._http.post(url, json=payload, idempotent=True)
             data = response.json()
             
             if response.status_code == 200:
@@ -114,13 +134,14 @@ class FirebaseAuth:
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    @instrumented('auth.verify_token')
     def verify_token(self, token):
         """Verify if the token is valid"""
         url = f"{FIREBASE_AUTH_URL}:lookup?key={self.api_key}"
         payload = {"idToken": token}
         
         try:
-            response = requests.post(url, json=payload)
+            response = self._http.post(url, json=payload, idempotent=True)
             data = response.json()
             
             if response.status_code == 200:
@@ -147,7 +168,7 @@ class FirebaseAuth:
         }
         
         try:
-            response = requests.post(url, json=payload)
+            response = self._http.post(url, json=payload)
             if response.status_code == 200:
                 return {'success': True}
             else:
@@ -187,6 +208,8 @@ def init_auth_session():
         st.session_state.auth_token = None
     if 'refresh_token' not in st.session_state:
         st.session_state.refresh_token = None
+    if 'token_expires_at' not in st.session_state:
+        st.session_state.token_expires_at = 0
     if 'username' not in st.session_state:
         st.session_state.username = None
     # Do not reinitialize if already authenticated
@@ -198,6 +221,7 @@ def login_user(user_data):
     st.session_state.user_email = user_data.get('email')
     st.session_state.auth_token = user_data.get('token')
     st.session_state.refresh_token = user_data.get('refresh_token')
+    st.session_state.token_expires_at = get_token_expiry(user_data.get('token'))
     st.session_state.username = user_data.get('username')
 
 def logout_user():
@@ -207,6 +231,7 @@ def logout_user():
     st.session_state.user_email = None
     st.session_state.auth_token = None
     st.session_state.refresh_token = None
+    st.session_state.token_expires_at = 0
     st.session_state.username = None
 
 def is_authenticated():
@@ -1,32 +1,130 @@
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import json
 import os
-import requests
-import uuid
+import threading
+import time
+from urllib.parse import quote
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from dotenv import load_dotenv
-from .firebase_auth import get_current_user, FirebaseAuth
+from .conditional_writes import create_if_absent
+from .data_manager import DataManager
+from .firebase_auth import get_token_expiry, FirebaseAuth
+from .http_transport import get_transport
+from .single_flight import get_single_flight
+from .instrumentation import cache_event, instrumented, record
+from .word_cache import get_detail_cache, get_word_cache
+from .local_mirror import get_local_mirror, ADD_WORDS, PUT_IF_ABSENT, RECORD_GAME_RESULT
+from .game_stats import (
+    etag_transaction, record_game_result, stats_from_items, stats_from_results, summarize_game_stats
+)
+from .json_stream import iter_children
+from .word_stats import (
+    counter_updates, is_complete, monthly_series, needs_rebuild, new_words_updates, rollup_from_words
+)
 
 # Load environment variables
 load_dotenv()
-FIREBASE_DATABASE_URL = os.getenv('FIREBASE_DATABASE_URL')
 
-class FirebaseSimpleManager:
-    def __init__(self):
-        self.database_url = FIREBASE_DATABASE_URL.rstrip('/')
-        self._auth = FirebaseAuth()
+# Refresh ID tokens this many seconds before they expire
+TOKEN_REFRESH_MARGIN = 300
+
+# Long text fields stored under word_details/{uid}/{key}, away from the list index
+DETAIL_FIELDS = ('definition', 'example1', 'example2')
+
+# Concurrent requests when fetching several words' details at once
+DETAIL_FETCH_WORKERS = 8
+
+# Characters that Realtime Database forbids in keys, plus '%' so escaping stays reversible
+_FORBIDDEN_KEY_CHARS = set('.$#[]/%')
+
+
+def escape_key(value):
+    """Percent-encode a string so it can be used as a single RTDB key."""
+    return ''.join(
+        f"%{ord(ch):02X}" if ch in _FORBIDDEN_KEY_CHARS or ord(ch) < 32 or ord(ch) == 127 else ch
+        for ch in str(value)
+    )
+
+
+def normalize_word(word):
+    """Case-fold and collapse whitespace: two words are duplicates if these match."""
+    return ' '.join(str(word).split()).casefold()
+
+
+def word_key(word):
+    """RTDB key under which a word is stored, so duplicates share the same path."""
+    return escape_key(normalize_word(word))
+
+
+def split_word_doc(word_doc):
+    """Split a full word record into its index projection and its detail payload."""
+    index = {field: value for field, value in word_doc.items() if field not in DETAIL_FIELDS}
+    details = {field: word_doc.get(field, '') for field in DETAIL_FIELDS}
+    return index, details
+
+
+def words_sync_params(entry):
+    """Query refreshing a cached snapshot: records since its high-water mark, or everything."""
+    if entry and entry['high_water']:
+        # startAt is inclusive, so the newest known records come back too
+        return {'orderBy': '"created_at"', 'startAt': json.dumps(entry['high_water'])}
+    return None
+
+
+def page_of_records(records, cursor=None, limit=20, order='desc'):
+    """Slice one page out of records keyed by RTDB key, ordered by (created_at, key).
+
+    `cursor` is the `next_cursor` of the previous page; the result is
+    {'words': [...], 'next_cursor': {...} or None}.
+    """
+    reverse = order == 'desc'
+    items = sorted(((record.get('created_at', ''), key) for key, record in records.items()), reverse=reverse)
+    if cursor:
+        mark = (cursor['created_at'], cursor['key'])
+        items = [item for item in items if (item < mark if reverse else item > mark)]
+    page = items[:limit]
+    next_cursor = {'created_at': page[-1][0], 'key': page[-1][1]} if len(items) > limit else None
+    return {'words': [records[key] for _, key in page], 'next_cursor': next_cursor}
+
+
+def user_path(root, user_id):
+    """Return the per-user partition of a top-level node, e.g. words/{uid}."""
+    return f"{root}/{escape_key(user_id)}"
+
+
+class FirebaseSimpleManager(DataManager):
+    def __init__(self, transport=None, word_cache=None, mirror=None, database_url=None, detail_cache=None,
+                 single_flight=None):
+        # Read at construction so tests and benchmarks can point at a local stand-in
+        self.database_url = (database_url or os.getenv('FIREBASE_DATABASE_URL')).rstrip('/')
+        self._http = transport or get_transport()
+        self._auth = FirebaseAuth(transport=self._http)
+        self._word_cache = word_cache or get_word_cache()
+        self._detail_cache = detail_cache or get_detail_cache()
+        self._single_flight = single_flight or get_single_flight()
+        # Optional SQLite mirror; when set, writes are queued instead of sent inline
+        self._mirror = mirror or get_local_mirror()
 
     def _get_token(self):
-        """Return a valid ID token, refreshing it if necessary."""
+        """Return a valid ID token, refreshing it shortly before it expires."""
         token = st.session_state.get('auth_token')
         if not token:
             return None
 
-        # Try a lightweight verify; if it fails, refresh
-        verify = self._auth.verify_token(token)
-        if verify.get('success'):
+        # The expiry is read from the token itself, so no network call is needed here
+        expires_at = st.session_state.get('token_expires_at') or get_token_expiry(token)
+        if time.time() < expires_at - TOKEN_REFRESH_MARGIN:
+            return token
+
+        refreshed = self._refresh_session_token()
+        if refreshed is None and time.time() < expires_at:
+            # Early refresh failed (e.g. auth API unreachable): the current token still works
             return token
+        return refreshed
 
-        # Token expired — attempt refresh
+    def _refresh_session_token(self):
+        """Exchange the refresh token for a new ID token and store it in the session."""
         refresh_tok = st.session_state.get('refresh_token')
         if not refresh_tok:
             return None
@@ -35,191 +133,550 @@ class FirebaseSimpleManager:
         if result.get('success'):
             st.session_state.auth_token = result['token']
             st.session_state.refresh_token = result['refresh_token']
+            st.session_state.token_expires_at = get_token_expiry(result['token'])
             return result['token']
 
         return None
 
+    def _recover_from_unauthorized(self):
+        """Handle a 401: return True if a fresh token was obtained and the call can be retried."""
+        token = st.session_state.get('auth_token')
+        if token and self._auth.verify_token(token).get('success'):
+            # The token is fine, the request was genuinely refused
+            return False
+        return self._refresh_session_token() is not None
+
+    def _request(self, method, path, **kwargs):
+        """Send an authenticated request, retrying once with a refreshed token on 401.
+
+        Identical GETs already in flight, from this or another session, share
+        one request. Paths are per-user partitions built from the caller's
+        own session, so a shared response never crosses users.
+        """
+        if method == "GET":
+            key = (self.database_url, path, json.dumps(kwargs, sort_keys=True, default=str))
+            return self._single_flight.do(key, lambda: self._send(method, path, **kwargs))
+        return self._send(method, path, **kwargs)
+
+    def _send(self, method, path, **kwargs):
+        response = self._http.request(method, self._url(path), **kwargs)
+        if response.status_code == 401 and self._recover_from_unauthorized():
+            response.close()
+            response = self._http.request(method, self._url(path), **kwargs)
+        return response
+
+    def _get_children(self, path, consume=dict, **kwargs):
+        """GET a node and hand its (key, child) pairs to `consume` as the body is parsed.
+
+        Returns (status_code, consume(pairs)), or (status_code, None) when the
+        request failed. Large nodes are never held in memory as raw text, only
+        as whatever `consume` keeps. Identical reads in flight share the result.
+        """
+        flight_key = (self.database_url, path, consume, json.dumps(kwargs, sort_keys=True, default=str))
+
+        def fetch():
+            with self._send("GET", path, stream=True, **kwargs) as response:
+                if response.status_code != 200:
+                    return response.status_code, None
+                return response.status_code, consume(iter_children(response))
+
+        return self._single_flight.do(flight_key, fetch)
+
     def _url(self, path):
         """Build an authenticated Firebase REST URL."""
         token = self._get_token()
         auth_param = f"?auth={token}" if token else ""
-        return f"{self.database_url}/{path}.json{auth_param}"
+        # Escaped keys contain '%', which must survive the server's URL decoding
+        return f"{self.database_url}/{quote(path)}.json{auth_param}"
+
+    def _queue_write(self, user_id, collection, records, method, path, body):
+        """Apply a write to the local mirror and queue it for the background flusher"""
+        self._mirror.flusher.remember_credentials(
+            user_id, self._get_token(), st.session_state.get('refresh_token')
+        )
+        self._mirror.write(collection, user_id, records, method, path, body)
 
-    def add_word(self, word_data):
-        """Add a new word to the database for the current user"""
+    @instrumented('firebase.add_word_outcome')
+    def add_word_outcome(self, word_data):
+        """Add a word without writing to the page; returns (status, message)
+
+        status is 'added', 'duplicate', 'invalid' or 'error'. Used by background
+        writes, whose thread must carry the session's script context.
+        """
         try:
-            user = get_current_user()
-            if not user:
-                st.error("Utilisateur non authentifié.")
-                return False
-            user_id = user.get('user_id') or user.get('email')
+            user_id = self._signed_in_user_id()
             if not user_id:
-                st.error("Impossible de récupérer l'identifiant utilisateur.")
-                return False
-
-            # Check if word already exists for this user
-            existing_words = self.get_all_words()
-            for word in existing_words:
-                if word.get('word', '').lower() == word_data.get('word', '').lower():
-                    st.warning(f"Le mot '{word_data.get('word', '')}' existe déjà dans votre liste.")
-                    return False
-
-            # Prepare word document
-            word_doc = {
-                'word': word_data.get('word', ''),
-                'translation': word_data.get('translation', ''),
-                'definition': word_data.get('definition', ''),
-                'example1': word_data.get('example1', ''),
-                'example2': word_data.get('example2', ''),
-                'created_at': datetime.now().isoformat(),
-                'id': str(uuid.uuid4()),
-                'user_id': user_id
-            }
-
-            # Send POST request to Firebase (authenticated)
-            response = requests.post(self._url("words"), json=word_doc)
+                return 'error', "Utilisateur non authentifié."
+
+            key = word_key(word_data.get('word', ''))
+            if not key:
+                return 'invalid', "Le mot à ajouter est vide."
+            word_path = f"{user_path('words', user_id)}/{key}"
+            duplicate_message = f"Le mot '{word_data.get('word', '')}' existe déjà dans votre liste."
+
+            if self._mirror:
+                # Offline-first: dedupe on the local snapshot, the flusher does the conditional create
+                existing_words = self._load_words(user_id)
+                if existing_words is None:
+                    return 'error', "Erreur lors de la récupération des mots."
+                if key in existing_words:
+                    return 'duplicate', duplicate_message
+                word_doc, details = split_word_doc(self._build_word_doc(word_data, user_id))
+                self._queue_write(user_id, 'words', {key: word_doc}, PUT_IF_ABSENT, word_path, {
+                    'key': key, 'record': word_doc, 'details': details,
+                    'details_path': f"{user_path('word_details', user_id)}/{key}",
+                    'stats_path': user_path("word_stats", user_id),
+                })
+                self._mirror.store('word_details', user_id, {key: details})
+                self._word_cache.put_record(user_id, key, word_doc)
+                self._detail_cache.put(user_id, key, details)
+                return 'added', None
+
+            # Known duplicate: answered from the cached snapshot without any request
+            entry = self._word_cache.get(user_id)
+            if entry and key in entry['records']:
+                return 'duplicate', duplicate_message
+
+            # Keyed existence lookup; its ETag guards the write below
+            existing = self._request("GET", word_path, headers={'X-Firebase-ETag': 'true'})
+            if existing.status_code != 200:
+                return 'error', f"Erreur lors de l'ajout: {existing.status_code}"
+            if existing.json() is not None:
+                return 'duplicate', duplicate_message
+
+            word_doc, details = split_word_doc(self._build_word_doc(word_data, user_id))
+
+            # Conditional PUT: fails with 412 if the key was written since the lookup
+            status = create_if_absent(
+                lambda method, **kwargs: self._send(method, word_path, **kwargs),
+                word_doc, existing.headers.get('ETag', '')
+            )
+
+            if status == 200:
+                # Keep the cached list current instead of forcing a refetch
+                self._word_cache.put_record(user_id, key, word_doc)
+                self._detail_cache.put(user_id, key, details)
+                # Details only go in once the key is ours, so a duplicate never overwrites them
+                details_path = f"{user_path('word_details', user_id)}/{key}"
+                updates = {details_path: details}
+                updates.update(counter_updates(user_path("word_stats", user_id), [word_doc]))
+                # Not replayed by the transport: a timed-out increment may already have landed
+                patched = self._request("PATCH", "", json=updates, idempotent=False)
+                if patched.status_code != 200:
+                    # Resend the details alone; counters are corrected by the next rebuild
+                    retried = self._request("PUT", details_path, json=details)
+                    if retried.status_code != 200:
+                        return 'error', (f"Le mot a été ajouté mais ses détails n'ont pas pu être "
+                                         f"enregistrés: {retried.status_code}")
+                return 'added', None
+            elif status == 412:
+                # Another session saved the same word in the meantime
+                return 'duplicate', duplicate_message
+            else:
+                return 'error', f"Erreur lors de l'ajout: {status}"
+
+        except Exception as e:
+            return 'error', f"Erreur lors de l'ajout du mot: {str(e)}"
+
+    @instrumented('firebase.add_words')
+    def add_words(self, words_data):
+        """Add several words for the current user in a single multi-path write
+
+        Returns one outcome per input, in order: {'word': ..., 'status': ...}
+        with status 'added', 'duplicate', 'invalid' or 'error'.
+        """
+        outcomes = [{'word': word_data.get('word', ''), 'status': 'error'} for word_data in words_data]
+        try:
+            user_id = self._user_id()
+            if not user_id:
+                return outcomes
+
+            # Dedupe against the (usually cached) index and within the batch
+            existing = self._load_words(user_id)
+            if existing is None:
+                return outcomes
+
+            new_records = {}
+            new_details = {}
+            pending = {}
+            for outcome, word_data in zip(outcomes, words_data):
+                key = word_key(word_data.get('word', ''))
+                if not key:
+                    outcome['status'] = 'invalid'
+                elif key in existing or key in new_records:
+                    outcome['status'] = 'duplicate'
+                else:
+                    new_records[key], new_details[key] = split_word_doc(self._build_word_doc(word_data, user_id))
+                    pending[key] = outcome
+
+            words_path = user_path("words", user_id)
+            if new_records and not self._mirror:
+                # The cached list may be stale: check the keys on the server (names only)
+                response = self._request("GET", words_path, params={'shallow': 'true'})
+                if response.status_code != 200:
+                    st.error(f"Erreur lors de la vérification des mots: {response.status_code}")
+                    return outcomes
+                for key in set(new_records) & set(response.json() or {}):
+                    del new_records[key], new_details[key]
+                    pending.pop(key)['status'] = 'duplicate'
+
+            if not new_records:
+                return outcomes
+
+            # One atomic PATCH at the root. A word added by another session between
+            # the check above and this write is overwritten with this batch's version
+            # and counted twice; the counters are corrected when they are rebuilt.
+            details_path = user_path("word_details", user_id)
+            stats_path = user_path("word_stats", user_id)
+            if self._mirror:
+                # The flusher checks the keys on the server when it sends the batch
+                self._queue_write(user_id, 'words', new_records, ADD_WORDS, words_path, {
+                    'details_path': details_path, 'stats_path': stats_path,
+                    'records': new_records, 'details': new_details,
+                })
+                self._mirror.store('word_details', user_id, new_details)
+                self._word_cache.put_records(user_id, new_records)
+                self._remember_details(user_id, new_details)
+                for outcome in pending.values():
+                    outcome['status'] = 'added'
+                return outcomes
+
+            updates = new_words_updates(words_path, details_path, stats_path, new_records, new_details)
+            # Not replayed by the transport: a timed-out increment may already have landed
+            response = self._request("PATCH", "", json=updates, idempotent=False)
 
             if response.status_code == 200:
-                return True
+                self._word_cache.put_records(user_id, new_records)
+                self._remember_details(user_id, new_details)
+                for outcome in pending.values():
+                    outcome['status'] = 'added'
             else:
                 st.error(f"Erreur lors de l'ajout: {response.status_code}")
-                return False
+            return outcomes
 
         except Exception as e:
-            st.error(f"Erreur lors de l'ajout du mot: {str(e)}")
-            return False
+            st.error(f"Erreur lors de l'ajout des mots: {str(e)}")
+            return outcomes
+
+    def _load_words(self, user_id):
+        """Return the user's word records keyed by RTDB key, or None on failure.
+
+        A fresh cached snapshot is returned without any network call. Once the
+        TTL has passed, only records created since the last sync are fetched
+        and merged into the snapshot. If Firebase cannot be reached, the last
+        snapshot keeps being served.
+        """
+        entry = self._word_cache.get(user_id)
+        fresh = bool(entry and self._word_cache.is_fresh(entry))
+        cache_event('word_cache', fresh)
+        if fresh:
+            return entry['records']
+
+        if entry is None and self._mirror and self._mirror.is_hydrated('words', user_id):
+            # Served from disk; the next refresh after the TTL is a delta sync
+            records = self._mirror.load('words', user_id)
+            self._word_cache.store(user_id, records, self._mirror.high_water('words', user_id))
+            return records
 
+        try:
+            status, fetched = self._get_children(user_path("words", user_id), params=words_sync_params(entry))
+        except Exception:
+            if entry:
+                return entry['records']
+            raise
+        if status != 200:
+            if entry:
+                return entry['records']
+            st.error(f"Erreur lors de la récupération des mots: {status}")
+            return None
+
+        records = self._store_fetched_words(user_id, entry, fetched)
+        return records if records is not None else self._load_words(user_id)
+
+    def _store_fetched_words(self, user_id, entry, fetched):
+        """Fold a words response into the cache and return the user's records.
+
+        Returns None if a delta arrived after its snapshot was evicted; the
+        caller then needs a full reload.
+        """
+        delta = bool(entry and entry['high_water'])
+        previous = entry['high_water'] if delta else ''
+        high_water = max([previous] + [r.get('created_at', '') for r in fetched.values()]) or None
+        if self._mirror:
+            self._mirror.sync('words', user_id, fetched, high_water)
+            if not delta:
+                # Words still waiting in the outbox are on disk but not on the server yet
+                fetched = self._mirror.load('words', user_id)
+
+        if delta:
+            merged = self._word_cache.merge(user_id, fetched, high_water)
+            if merged is None:
+                self._word_cache.invalidate(user_id)
+            return merged
+        self._word_cache.store(user_id, fetched, high_water)
+        return fetched
+
+    @instrumented('firebase.get_all_words')
     def get_all_words(self):
         """Retrieve all words for the current user from the database"""
         try:
-            user = get_current_user()
-            if not user:
-                st.error("Utilisateur non authentifié.")
+            user_id = self._user_id()
+            if not user_id:
                 return []
-            user_id = user.get('user_id') or user.get('email')
-            response = requests.get(self._url("words"))
-
-            if response.status_code == 200:
-                words_data = response.json() or {}
-                word_list = []
-                for key, word_data in words_data.items():
-                    # Filtrer par user_id
-                    if word_data.get('user_id') == user_id:
-                        word_list.append(word_data)
-                # Sort by creation date (newest first)
-                word_list.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-                return word_list
-            else:
-                st.error(f"Erreur lors de la récupération des mots: {response.status_code}")
+            # Only the user's own partition is downloaded
+            words_data = self._load_words(user_id)
+            if words_data is None:
                 return []
+
+            word_list = list(words_data.values())
+            # Sort by creation date (newest first)
+            word_list.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+            return word_list
         except Exception as e:
             st.error(f"Erreur lors de la récupération des mots: {str(e)}")
             return []
 
-    def get_random_words(self, count=10):
-        """Get random words for quiz (for current user)"""
-        import random
+    @instrumented('firebase.get_words_page')
+    def get_words_page(self, cursor=None, limit=20, order='desc'):
+        """Get one page of the current user's words, newest first by default
+
+        Pass the returned `next_cursor` back to get the following page. Only
+        the requested page is downloaded unless the full list is already cached.
+        """
+        empty_page = {'words': [], 'next_cursor': None}
         try:
-            all_words = self.get_all_words()
-            if len(all_words) < count:
-                st.warning(f"Vous n'avez pas assez de mots pour jouer (minimum {count}).")
-                return []
-            return random.sample(all_words, count)
+            user_id = self._user_id()
+            if not user_id:
+                return empty_page
+
+            entry = self._word_cache.get(user_id)
+            if self._mirror or (entry and self._word_cache.is_fresh(entry)):
+                return page_of_records(self._load_words(user_id) or {}, cursor, limit, order)
+
+            # One extra record tells whether a next page exists, and one more
+            # covers the cursor record itself since startAt/endAt are inclusive
+            params = {'orderBy': '"created_at"'}
+            if cursor:
+                params['endAt' if order == 'desc' else 'startAt'] = json.dumps(cursor['created_at'])
+            fetch = limit + (2 if cursor else 1)
+            while True:
+                params['limitToLast' if order == 'desc' else 'limitToFirst'] = fetch
+                status, records = self._get_children(user_path("words", user_id), params=params)
+                if status != 200:
+                    st.error(f"Erreur lors de la récupération des mots: {status}")
+                    return empty_page
+                page = page_of_records(records, cursor, limit, order)
+                if page['next_cursor'] or len(records) < fetch:
+                    return page
+                # The query can only bound created_at: records sharing the cursor's
+                # timestamp but already shown took up the window, so widen it
+                fetch *= 2
         except Exception as e:
-            st.error(f"Erreur lors de la sélection aléatoire: {str(e)}")
-            return []
+            st.error(f"Erreur lors de la récupération des mots: {str(e)}")
+            return empty_page
+
+    def _remember_details(self, user_id, details_by_key):
+        for key, details in details_by_key.items():
+            self._detail_cache.put(user_id, key, details)
+
+    @instrumented('firebase.get_words_details')
+    def get_words_details(self, words):
+        """Return full records for listed words (index projections), in the same order
+
+        Details are fetched per word only when not already known, and several
+        missing ones are requested concurrently.
+        """
+        empty = dict.fromkeys(DETAIL_FIELDS, '')
+        try:
+            user_id = self._user_id()
+            if not user_id:
+                return [{**empty, **word} for word in words]
+            details_root = user_path("word_details", user_id)
+
+            found = {}
+            for word in words:
+                key = word_key(word.get('word', ''))
+                if any(field in word for field in DETAIL_FIELDS):
+                    # Saved before details were split out: the record is already complete
+                    found[key] = {field: word.get(field, '') for field in DETAIL_FIELDS}
+                elif key not in found:
+                    details = self._detail_cache.get(user_id, key)
+                    if details is None and self._mirror:
+                        details = self._mirror.load_record('word_details', user_id, key)
+                    if details is not None:
+                        found[key] = details
+
+            missing = {word_key(w.get('word', '')) for w in words} - set(found) - {''}
+            record({'name': 'detail_cache', 'kind': 'cache', 'duration_ms': 0,
+                    'cache': f"{len(found)} hit, {len(missing)} miss"})
+            if missing:
+                def fetch(key):
+                    response = self._request("GET", f"{details_root}/{key}")
+                    return response.json() if response.status_code == 200 else None
+
+                # Workers carry the script context: the token refresh and instrumentation read the session
+                ctx = get_script_run_ctx()
+                with ThreadPoolExecutor(max_workers=min(DETAIL_FETCH_WORKERS, len(missing)),
+                                        initializer=lambda: ctx and add_script_run_ctx(threading.current_thread(), ctx)) as pool:
+                    values = dict(zip(missing, pool.map(fetch, missing)))
+                fetched = {key: {**empty, **value} for key, value in values.items() if value is not None}
+                self._remember_details(user_id, fetched)
+                if self._mirror and fetched:
+                    self._mirror.store('word_details', user_id, fetched)
+                found.update(fetched)
+
+            return [{**word, **found.get(word_key(word.get('word', '')), empty)} for word in words]
+        except Exception as e:
+            st.error(f"Erreur lors de la récupération des détails: {str(e)}")
+            return [{**empty, **word} for word in words]
 
-    def save_game_result(self, score, total_questions):
-        """Save game result to database for current user"""
+    @instrumented('firebase.save_game_outcome')
+    def save_game_outcome(self, score, total_questions):
+        """Save a game result without writing to the page; returns ('saved' or 'error', message)"""
         try:
-            user = get_current_user()
-            if not user:
-                st.error("Utilisateur non authentifié.")
-                return False
-            user_id = user.get('user_id') or user.get('email')
-            game_doc = {
-                'score': score,
-                'total_questions': total_questions,
-                'percentage': (score / total_questions) * 100,
-                'played_at': datetime.now().isoformat(),
-                'id': str(uuid.uuid4()),
-                'user_id': user_id
-            }
-            response = requests.post(self._url("game_results"), json=game_doc)
+            user_id = self._signed_in_user_id()
+            if not user_id:
+                return 'error', "Utilisateur non authentifié."
+            game_doc = self._build_game_doc(score, total_questions, user_id)
+            stats_path = user_path("game_stats", user_id)
+            if self._mirror:
+                # Keyed by id rather than a push key so a replayed write stays idempotent
+                result_path = f"{user_path('game_results', user_id)}/{game_doc['id']}"
+                self._queue_write(user_id, 'game_results', {game_doc['id']: game_doc}, 'PUT', result_path, game_doc)
+                self._queue_write(user_id, 'game_results', {}, RECORD_GAME_RESULT, stats_path,
+                                  {'game': game_doc, 'results_path': user_path('game_results', user_id)})
+                return 'saved', None
+            response = self._request("POST", user_path("game_results", user_id), json=game_doc)
             if response.status_code == 200:
-                return True
+                # Keep the per-user aggregate in step with the history
+                committed = record_game_result(
+                    lambda method, **kwargs: self._request(method, stats_path, **kwargs),
+                    lambda: self._fetch_game_results(user_id),
+                    game_doc
+                )
+                if committed is None:
+                    # Dropping the aggregate makes the next read rebuild it from the history
+                    self._request("DELETE", stats_path)
+                return 'saved', None
             else:
-                st.error(f"Erreur lors de la sauvegarde du score: {response.status_code}")
-                return False
+                return 'error', f"Erreur lors de la sauvegarde du score: {response.status_code}"
         except Exception as e:
-            st.error(f"Erreur lors de la sauvegarde du score: {str(e)}")
-            return False
+            return 'error', f"Erreur lors de la sauvegarde du score: {str(e)}"
+
+    def _fetch_game_results(self, user_id):
+        """Download the user's full game history (only needed to seed the aggregate)"""
+        status, results = self._get_children(user_path("game_results", user_id))
+        if status != 200:
+            raise RuntimeError(f"HTTP {status}")
+        return results
+
+    def _fold_game_results(self, user_id):
+        """Build the aggregate from the history as it downloads, without keeping the games"""
+        status, stats = self._get_children(user_path("game_results", user_id), consume=stats_from_items)
+        if status != 200:
+            raise RuntimeError(f"HTTP {status}")
+        return stats
 
+    @instrumented('firebase.get_game_stats')
     def get_game_stats(self):
         """Get game statistics for current user"""
         try:
-            user = get_current_user()
-            if not user:
-                st.error("Utilisateur non authentifié.")
+            user_id = self._user_id()
+            if not user_id:
                 return {'total_games': 0, 'best_score': 0, 'average_score': 0}
-            user_id = user.get('user_id') or user.get('email')
-            response = requests.get(self._url("game_results"))
-            if response.status_code == 200:
-                results_data = response.json() or {}
-                user_results = [r for r in results_data.values() if r.get('user_id') == user_id]
-                total_games = len(user_results)
-                best_score = max([r.get('percentage', 0) for r in user_results], default=0)
-                average_score = sum([r.get('percentage', 0) for r in user_results]) / total_games if total_games > 0 else 0
-                return {
-                    'total_games': total_games,
-                    'best_score': best_score,
-                    'average_score': average_score
-                }
-            else:
+            if self._mirror:
+                if self._mirror.is_hydrated('game_results', user_id):
+                    results_data = self._mirror.load('game_results', user_id)
+                else:
+                    self._mirror.sync('game_results', user_id, self._fetch_game_results(user_id))
+                    # Includes the games still waiting in the outbox
+                    results_data = self._mirror.load('game_results', user_id)
+                return summarize_game_stats(stats_from_results(results_data))
+
+            # A single small node, whatever the length of the history
+            stats_path = user_path("game_stats", user_id)
+            response = self._request("GET", stats_path)
+            if response.status_code != 200:
                 st.error(f"Erreur lors de la récupération des statistiques: {response.status_code}")
                 return {'total_games': 0, 'best_score': 0, 'average_score': 0}
+
+            stats = response.json()
+            if stats is None:
+                # No aggregate yet: build it once from the history
+                stats = self._fold_game_results(user_id)
+                etag_transaction(
+                    lambda method, **kwargs: self._request(method, stats_path, **kwargs),
+                    lambda current: current if current is not None else stats
+                )
+            return summarize_game_stats(stats)
         except Exception as e:
             st.error(f"Erreur lors de la récupération des statistiques: {str(e)}")
             return {'total_games': 0, 'best_score': 0, 'average_score': 0}
 
+    @instrumented('firebase.get_total_words_count')
     def get_total_words_count(self):
-        """Get total number of words for current user"""
-        try:
-            words = self.get_all_words()
-            return len(words)
-        except:
-            return 0
+        """Get total number of words for current user
 
-    def get_total_games_count(self):
-        """Get total number of games played for current user"""
+        Counted from the cached list when it is fresh, otherwise read from the
+        word_stats counter, or from a shallow listing of the word keys for
+        users whose counters are not built yet. No record body is downloaded.
+        """
         try:
-            stats = self.get_game_stats()
-            return stats['total_games']
-        except:
-            return 0
+            user_id = self._user_id()
+            if not user_id:
+                return 0
+            entry = self._word_cache.get(user_id)
+            if self._mirror or (entry and self._word_cache.is_fresh(entry)):
+                return len(self._load_words(user_id) or {})
 
-    def get_best_score(self):
-        """Get best score for current user"""
-        try:
-            stats = self.get_game_stats()
-            return round(stats['best_score'], 1) if stats['best_score'] else None
+            # Shallow: the monthly and daily maps come back as `true`
+            response = self._request("GET", user_path("word_stats", user_id), params={'shallow': 'true'})
+            if response.status_code == 200:
+                counters = response.json()
+                if is_complete(counters) and isinstance(counters.get('total'), int):
+                    return counters['total']
+
+            response = self._request("GET", user_path("words", user_id), params={'shallow': 'true'})
+            if response.status_code != 200:
+                return 0
+            return len(response.json() or {})
         except:
-            return None
+            return 0
 
+    @instrumented('firebase.get_monthly_progress')
     def get_monthly_progress(self):
         """Get monthly learning progress for current user"""
         try:
-            words = self.get_all_words()
-            monthly_data = {}
-            for word_data in words:
-                if 'created_at' in word_data:
-                    month = word_data['created_at'][:7]  # YYYY-MM
-                    if month not in monthly_data:
-                        monthly_data[month] = {'month': month, 'count': 0}
-                    monthly_data[month]['count'] += 1
-            # Sort by date and return
-            sorted_data = sorted(monthly_data.values(), key=lambda x: x['month'])
-            return sorted_data
+            user_id = self._user_id()
+            if not user_id:
+                return []
+            if self._mirror:
+                # The local snapshot is already in memory
+                return monthly_series(rollup_from_words(self._load_words(user_id)))
+
+            stats_path = user_path("word_stats", user_id)
+            response = self._request("GET", stats_path)
+            if response.status_code != 200:
+                st.error(f"Erreur lors de la récupération des données mensuelles: {response.status_code}")
+                return []
+
+            rollup = response.json()
+            if needs_rebuild(rollup):
+                rollup = self.rebuild_word_stats(user_id) or rollup_from_words(self._load_words(user_id) or {})
+            return monthly_series(rollup)
         except Exception as e:
             st.error(f"Erreur lors de la récupération des données mensuelles: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+
+    def rebuild_word_stats(self, user_id):
+        """Recompute word_stats/{uid} from the user's words; returns the stored counters"""
+        # Read the list from the server: words saved by other sessions may not be cached yet
+        self._word_cache.invalidate(user_id)
+        records = self._load_words(user_id)
+        if records is None:
+            return None
+        rollup = rollup_from_words(records)
+        return etag_transaction(
+            lambda method, **kwargs: self._request(method, user_path("word_stats", user_id), **kwargs),
+            lambda current: rollup if needs_rebuild(current) else current
+        )
@@ -0,0 +1,114 @@
+"""
+Per-user game statistics maintained on write
+game_stats/{uid} holds the number of games, the sum of percentages, the best
+percentage and the last play date, so reading stats costs one small request
+however many games were played. It also remembers the ids of the latest
+games folded in, so a write replayed after a lost response counts once.
+"""
+import requests
+
+# Attempts of an ETag transaction before giving up on a busy node
+MAX_TRANSACTION_ATTEMPTS = 5
+
+# Ids of the most recent games kept in the aggregate to recognise replays
+APPLIED_IDS_KEPT = 50
+
+
+def stats_from_results(results):
+    """Build the aggregate from raw game results (keyed by RTDB key)."""
+    return stats_from_items((results or {}).items())
+
+
+def stats_from_items(items):
+    """Build the aggregate from (key, game result) pairs, e.g. while a response is parsed."""
+    stats = None
+    for _, game_doc in items:
+        stats = apply_game_result(stats, game_doc)
+    return stats or apply_game_result(None, None)
+
+
+def apply_game_result(stats, game_doc):
+    """Return the aggregate updated with one more game; a game already folded in is skipped."""
+    stats = stats or {'count': 0, 'sum_percentage': 0, 'best': 0, 'last_played_at': None}
+    if not game_doc:
+        return stats
+    applied = dict(stats.get('applied') or {})
+    game_id = game_doc.get('id')
+    if game_id in applied:
+        return stats
+    percentage = game_doc.get('percentage', 0)
+    played_at = game_doc.get('played_at')
+    if game_id:
+        applied[game_id] = played_at or ''
+        if len(applied) > APPLIED_IDS_KEPT:
+            latest = sorted(applied.items(), key=lambda item: item[1], reverse=True)[:APPLIED_IDS_KEPT]
+            applied = dict(latest)
+    return {
+        'count': stats['count'] + 1,
+        'sum_percentage': stats['sum_percentage'] + percentage,
+        'best': max(stats['best'], percentage),
+        'last_played_at': max(filter(None, [stats.get('last_played_at'), played_at]), default=None),
+        'applied': applied,
+    }
+
+
+def summarize_game_stats(stats):
+    """Convert the stored aggregate to the dict the pages display."""
+    stats = stats or {}
+    total_games = stats.get('count', 0)
+    return {
+        'total_games': total_games,
+        'best_score': stats.get('best', 0),
+        'average_score': stats.get('sum_percentage', 0) / total_games if total_games > 0 else 0,
+    }
+
+
+def etag_transaction(send, update, max_attempts=MAX_TRANSACTION_ATTEMPTS):
+    """Read-modify-write one node with `if-match` preconditions.
+
+    `send(method, **kwargs)` performs a request against the node and
+    `update(current)` returns the value to store and must leave a value
+    that already includes its change as it is: the PUT is not replayed by
+    the transport, and after a lost response the next attempt starts from
+    what the node holds. On 412 the database replies with the current value
+    and ETag, which feed the next attempt.
+    Returns the committed value, or None if the write did not go through.
+    """
+    response = send("GET", headers={'X-Firebase-ETag': 'true'})
+    if response.status_code != 200:
+        return None
+    current, etag = response.json(), response.headers.get('ETag', '')
+
+    for _ in range(max_attempts):
+        new_value = update(current)
+        if new_value == current:
+            return current
+        try:
+            response = send("PUT", json=new_value, headers={'if-match': etag, 'X-Firebase-ETag': 'true'},
+                            idempotent=False)
+        except (requests.ConnectionError, requests.Timeout):
+            # The write may have landed: read the node again
+            response = send("GET", headers={'X-Firebase-ETag': 'true'})
+            if response.status_code != 200:
+                return None
+        else:
+            if response.status_code == 200:
+                return new_value
+            if response.status_code != 412:
+                return None
+        current, etag = response.json(), response.headers.get('ETag', '')
+    return None
+
+
+def record_game_result(send, fetch_results, game_doc):
+    """Fold a saved game into the user's aggregate.
+
+    Users without an aggregate yet (history saved before aggregates existed)
+    are seeded from `fetch_results()`, which already contains `game_doc`.
+    """
+    def update(current):
+        if current is None:
+            return stats_from_results(fetch_results())
+        return apply_game_result(current, game_doc)
+
+    return etag_transaction(send, update)
@@ -0,0 +1,112 @@
+"""
+Shared HTTP transport for the Firebase REST APIs
+Keeps connections alive between calls and retries transient failures
+"""
+import os
+import random
+import time
+from urllib.parse import unquote, urlsplit
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from .instrumentation import span
+
+# Load environment variables
+load_dotenv()
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '15'))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '3'))
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '20'))
+
+# Backoff between retries: base * 2^attempt seconds, capped, with full jitter
+BACKOFF_BASE = 0.3
+BACKOFF_MAX = 8.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+class HttpTransport:
+    def __init__(self, connect_timeout=HTTP_CONNECT_TIMEOUT, read_timeout=HTTP_READ_TIMEOUT,
+                 max_retries=HTTP_MAX_RETRIES, pool_size=HTTP_POOL_SIZE):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+
+    def request(self, method, url, idempotent=None, **kwargs):
+        """Send a request over the pooled session, retrying transient failures.
+
+        Non-idempotent requests (POST by default) are only retried when the
+        server cannot have processed them: connection failures and 429.
+        """
+        with span(call_name(method, url), kind='http') as call:
+            response = self._request(method, url, idempotent, call, **kwargs)
+            call['status'] = response.status_code
+            if kwargs.get('stream'):
+                # The body is consumed later by the caller; only its announced size is known here
+                call['bytes'] = int(response.headers.get('Content-Length') or 0) or None
+            else:
+                call['bytes'] = len(response.content)
+            return response
+
+    def _request(self, method, url, idempotent, call, **kwargs):
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        kwargs.setdefault('timeout', self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            call['attempts'] = attempt + 1
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                safe = idempotent or isinstance(e, requests.ConnectTimeout)
+                if last_attempt or not safe:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+
+            retryable = response.status_code == 429 or (idempotent and response.status_code in RETRY_STATUSES)
+            if last_attempt or not retryable:
+                return response
+            # Release the connection to the pool before waiting for the next attempt
+            response.close()
+            time.sleep(self._backoff(attempt, response.headers.get('Retry-After')))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def _backoff(self, attempt, retry_after=None):
+        """Seconds to wait before the next attempt."""
+        if retry_after:
+            try:
+                return min(float(retry_after), BACKOFF_MAX)
+            except ValueError:
+                pass
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def call_name(method, url):
+    """Short name of a request for traces, e.g. 'rtdb GET words/<uid>'; query strings (tokens) are dropped."""
+    parts = urlsplit(url)
+    if parts.netloc.endswith('googleapis.com'):
+        service, path = 'auth', parts.path.rsplit('/', 1)[-1]
+    else:
+        service, path = 'rtdb', unquote(parts.path).strip('/').removesuffix('.json') or '/'
+    return f"{service} {method.upper()} {path}"
+
+
+@st.cache_resource
+def get_transport():
+    """Process-wide transport so every session reuses the same warm connections."""
+    return HttpTransport()
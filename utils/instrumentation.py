@@ -0,0 +1,128 @@
+"""
+Per-rerun instrumentation of external calls
+Every Firebase, Hugging Face and gTTS call made during a page run is recorded
+with its duration, size, status and cache outcome.
+- PERF_DEBUG=1 adds an opt-in panel to the sidebar listing the current run's calls
+- PERF_TRACE_PATH appends every call to a JSON lines file
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+PERF_DEBUG = os.getenv('PERF_DEBUG', '').lower() in ('1', 'true', 'yes')
+PERF_TRACE_PATH = os.getenv('PERF_TRACE_PATH')
+
+_trace_lock = threading.Lock()
+
+
+def _current_run():
+    """Calls collected for the session's current rerun, or None outside a session."""
+    if get_script_run_ctx() is None:
+        return None
+    try:
+        return st.session_state.get('perf_run')
+    except Exception:
+        return None
+
+
+def record(call):
+    """Store one finished call: {'name', 'duration_ms', 'status', 'bytes', 'cache', ...}."""
+    call = {'ts': round(time.time(), 3), **call}
+    run = _current_run()
+    if run is not None:
+        run['calls'].append(call)
+        if run['panel'] is not None and threading.current_thread() is run['thread']:
+            _render_panel(run)
+
+    if PERF_TRACE_PATH:
+        line = {
+            'run_id': run['id'] if run else None,
+            'session_id': run['session_id'] if run else None,
+            'page': run['page'] if run else None,
+            **call,
+        }
+        with _trace_lock:
+            with open(PERF_TRACE_PATH, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(line, default=str) + '\n')
+
+
+@contextmanager
+def span(name, kind='call', **fields):
+    """Time the enclosed call; fill 'status', 'bytes' or 'cache' on the yielded dict."""
+    call = {'name': name, 'kind': kind, **fields}
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        call.setdefault('status', type(e).__name__)
+        raise
+    finally:
+        call['duration_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        record(call)
+
+
+def instrumented(name):
+    """Decorator recording every call of a function as a span."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def cache_event(name, hit):
+    record({'name': name, 'kind': 'cache', 'cache': 'hit' if hit else 'miss', 'duration_ms': 0})
+
+
+def start_rerun(page):
+    """Begin collecting this run's calls; call once at the top of every page."""
+    ctx = get_script_run_ctx()
+    run = {
+        'id': uuid.uuid4().hex[:12],
+        'session_id': ctx.session_id if ctx else None,
+        'page': page,
+        'thread': threading.current_thread(),
+        'panel': None,
+        'calls': [],
+    }
+    st.session_state.perf_run = run
+    if PERF_DEBUG:
+        with st.sidebar:
+            if st.toggle("🐞 Mesures de performance", key="perf_debug_panel"):
+                run['panel'] = st.empty()
+                _render_panel(run)
+
+
+def _render_panel(run):
+    calls = list(run['calls'])
+    network = [call for call in calls if call.get('kind') == 'http']
+    with run['panel'].container():
+        st.caption(
+            f"{len(network)} requêtes réseau - "
+            f"{sum(call['duration_ms'] for call in network):.0f} ms - "
+            f"{sum(call.get('bytes') or 0 for call in network) / 1024:.1f} Ko"
+        )
+        if calls:
+            st.dataframe(
+                [{
+                    'Appel': call['name'],
+                    'Type': call.get('kind'),
+                    'ms': call['duration_ms'],
+                    'Octets': call.get('bytes'),
+                    'Statut': call.get('status'),
+                    'Cache': call.get('cache'),
+                } for call in calls],
+                hide_index=True,
+                use_container_width=True
+            )
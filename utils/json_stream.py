@@ -0,0 +1,83 @@
+"""
+Incremental parsing of Realtime Database responses
+The children of a JSON object are yielded one by one while the body is still
+arriving, so neither the raw payload nor its decoded text is held in memory
+next to the parsed records. Falls back to a regular parse when ijson is not
+installed.
+"""
+try:
+    import ijson
+except ImportError:
+    # Optional: responses are then parsed in one piece
+    ijson = None
+
+# Bytes read from the socket at a time
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkReader:
+    """File-like view of an iterator of byte chunks, as ijson reads it."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+
+    def read(self, size=-1):
+        if size == 0:
+            # ijson probes the type of the stream with an empty read
+            return b''
+        # ijson stops at the first empty read, so empty chunks are skipped
+        for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b''
+
+
+class _AsyncChunkReader:
+    def __init__(self, chunks):
+        self._chunks = chunks.__aiter__()
+
+    async def read(self, size=-1):
+        if size == 0:
+            return b''
+        async for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b''
+
+
+def iter_children(response):
+    """Yield (key, value) for each child of the object in a `stream=True` requests response.
+
+    A `null` body (missing node) yields nothing.
+    """
+    if ijson is None:
+        yield from (response.json() or {}).items()
+        return
+    reader = _ChunkReader(response.iter_content(STREAM_CHUNK_SIZE))
+    names = {}
+    for key, value in ijson.kvitems(reader, '', use_float=True):
+        yield key, _share_names(value, names)
+
+
+async def aiter_children(response):
+    """Async counterpart of iter_children for a streamed httpx response."""
+    if ijson is None:
+        await response.aread()
+        for item in (response.json() or {}).items():
+            yield item
+        return
+    reader = _AsyncChunkReader(response.aiter_bytes(STREAM_CHUNK_SIZE))
+    names = {}
+    async for key, value in ijson.kvitems_async(reader, '', use_float=True):
+        yield key, _share_names(value, names)
+
+
+def _share_names(value, names):
+    """Make records reuse one string per field name, as json.loads does.
+
+    ijson creates a new key string in every record, which would otherwise
+    make the parsed list larger than a regular parse.
+    """
+    if isinstance(value, dict):
+        return {names.setdefault(name, name): _share_names(item, names) for name, item in value.items()}
+    return value
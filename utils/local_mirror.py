@@ -0,0 +1,397 @@
+"""
+Optional SQLite mirror of each user's words and game results
+Reads are served from disk and writes go through a durable outbox that a
+background thread flushes to Firebase, so the UI never waits on the network.
+Enabled by setting LOCAL_MIRROR_PATH.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote
+import streamlit as st
+from dotenv import load_dotenv
+from .firebase_auth import FirebaseAuth, get_token_expiry
+from .http_transport import get_transport
+from .conditional_writes import create_if_absent, is_own_record
+from .game_stats import record_game_result
+from .json_stream import iter_children
+from .word_stats import counter_updates, new_words_updates
+
+# Load environment variables
+load_dotenv()
+LOCAL_MIRROR_PATH = os.getenv('LOCAL_MIRROR_PATH')
+OUTBOX_FLUSH_INTERVAL = float(os.getenv('OUTBOX_FLUSH_INTERVAL', '2'))
+
+# Retry delay for a failed outbox operation: base * 2^attempts seconds, capped
+OUTBOX_BACKOFF_BASE = 2.0
+OUTBOX_BACKOFF_MAX = 300.0
+
+# Conditional create used by add_word: skipped if the key already exists remotely,
+# otherwise followed by a multi-path update (word details and counters), which is
+# retried on its own once the create has succeeded
+PUT_IF_ABSENT = 'PUT_IF_ABSENT'
+# Batch of new words: keys already on the server are dropped when it is sent, so
+# counters are only bumped for words it creates, even when it is retried
+ADD_WORDS = 'ADD_WORDS'
+# ETag transaction folding a game into game_stats/{uid}
+RECORD_GAME_RESULT = 'RECORD_GAME_RESULT'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    collection TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (collection, user_id, key)
+);
+CREATE TABLE IF NOT EXISTS hydrated (
+    collection TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    high_water TEXT,
+    PRIMARY KEY (collection, user_id)
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    method TEXT NOT NULL,
+    path TEXT NOT NULL,
+    body TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+"""
+
+
+class LocalMirror:
+    def __init__(self, path):
+        self.path = path
+        self.flusher = None
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        """One connection per thread; WAL lets the flusher write while pages read."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # Records
+
+    def is_hydrated(self, collection, user_id):
+        row = self._conn().execute(
+            "SELECT 1 FROM hydrated WHERE collection = ? AND user_id = ?", (collection, user_id)
+        ).fetchone()
+        return row is not None
+
+    def high_water(self, collection, user_id):
+        row = self._conn().execute(
+            "SELECT high_water FROM hydrated WHERE collection = ? AND user_id = ?", (collection, user_id)
+        ).fetchone()
+        return row[0] if row else None
+
+    def load_record(self, collection, user_id, key):
+        row = self._conn().execute(
+            "SELECT data FROM records WHERE collection = ? AND user_id = ? AND key = ?", (collection, user_id, key)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load(self, collection, user_id):
+        """Return the user's mirrored records keyed by RTDB key."""
+        rows = self._conn().execute(
+            "SELECT key, data FROM records WHERE collection = ? AND user_id = ?", (collection, user_id)
+        )
+        return {key: json.loads(data) for key, data in rows}
+
+    def sync(self, collection, user_id, records, high_water=None):
+        """Upsert records read from Firebase and mark the user's collection as mirrored.
+
+        Nothing is deleted, so local writes still waiting in the outbox survive.
+        """
+        conn = self._conn()
+        with conn:
+            self._upsert(conn, collection, user_id, records)
+            conn.execute(
+                "INSERT OR REPLACE INTO hydrated (collection, user_id, high_water) VALUES (?, ?, ?)",
+                (collection, user_id, high_water)
+            )
+
+    def store(self, collection, user_id, records):
+        """Upsert records without queueing anything, e.g. details already saved remotely."""
+        conn = self._conn()
+        with conn:
+            self._upsert(conn, collection, user_id, records)
+
+    def write(self, collection, user_id, records, method, path, body):
+        """Apply a write locally and queue it for Firebase in the same transaction."""
+        conn = self._conn()
+        with conn:
+            self._upsert(conn, collection, user_id, records)
+            conn.execute(
+                "INSERT INTO outbox (user_id, method, path, body) VALUES (?, ?, ?, ?)",
+                (user_id, method, path, json.dumps(body))
+            )
+        if self.flusher:
+            self.flusher.wake()
+
+    def _upsert(self, conn, collection, user_id, records):
+        conn.executemany(
+            "INSERT OR REPLACE INTO records (collection, user_id, key, data) VALUES (?, ?, ?, ?)",
+            [(collection, user_id, key, json.dumps(record)) for key, record in records.items()]
+        )
+
+    # Outbox
+
+    def due_operations(self, limit=100):
+        rows = self._conn().execute(
+            "SELECT id, user_id, method, path, body, attempts FROM outbox "
+            "WHERE state = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+            (time.time(), limit)
+        )
+        return [
+            {'id': row[0], 'user_id': row[1], 'method': row[2], 'path': row[3],
+             'body': json.loads(row[4]) if row[4] else None, 'attempts': row[5]}
+            for row in rows
+        ]
+
+    def pending_count(self, user_id):
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM outbox WHERE user_id = ? AND state = 'pending'", (user_id,)
+        ).fetchone()
+        return row[0]
+
+    def failed_operations(self, user_id):
+        rows = self._conn().execute(
+            "SELECT id, method, path, body, last_error FROM outbox WHERE user_id = ? AND state = 'failed' ORDER BY id",
+            (user_id,)
+        )
+        return [
+            {'id': row[0], 'method': row[1], 'path': row[2],
+             'body': json.loads(row[3]) if row[3] else None, 'last_error': row[4]}
+            for row in rows
+        ]
+
+    def retry_failed(self, op_id):
+        """Put a parked operation back in the queue, to be sent on the next flush."""
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "UPDATE outbox SET state = 'pending', attempts = 0, next_attempt_at = 0 WHERE id = ?", (op_id,)
+            )
+        if self.flusher:
+            self.flusher.wake()
+
+    def mark_done(self, op_id):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM outbox WHERE id = ?", (op_id,))
+
+    def update_body(self, op_id, body):
+        """Record progress made by a multi-step operation, so a retry resumes after it."""
+        conn = self._conn()
+        with conn:
+            conn.execute("UPDATE outbox SET body = ? WHERE id = ?", (json.dumps(body), op_id))
+
+    def mark_retry(self, op, error):
+        delay = min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * 2 ** op['attempts'])
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (time.time() + delay, str(error), op['id'])
+            )
+
+    def mark_failed(self, op_id, error):
+        """Park an operation the server rejected for good; it is kept for inspection."""
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "UPDATE outbox SET state = 'failed', last_error = ? WHERE id = ?", (str(error), op_id)
+            )
+
+
+def stamp_created_at(user_id, records, mirror):
+    """Date queued words from the moment they reach Firebase, locally too.
+
+    Other sessions refresh their lists with records created since their last
+    sync: a word dated from when it was queued could fall before that point
+    and never reach them.
+    """
+    created_at = datetime.now().isoformat()
+    records = {key: {**record, 'created_at': created_at} for key, record in records.items()}
+    mirror.store('words', user_id, records)
+    return records
+
+
+class OutboxFlusher:
+    """Background thread replaying queued writes against the Realtime Database."""
+
+    def __init__(self, mirror, transport, database_url, interval=OUTBOX_FLUSH_INTERVAL):
+        self.mirror = mirror
+        self.database_url = database_url.rstrip('/')
+        self.interval = interval
+        self._http = transport
+        self._auth = FirebaseAuth(transport=transport)
+        self._credentials = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="outbox-flusher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def remember_credentials(self, user_id, token, refresh_token):
+        """Tokens only live in memory: queued writes wait for the user's next visit after a restart."""
+        if not token:
+            return
+        expires_at = get_token_expiry(token)
+        with self._lock:
+            current = self._credentials.get(user_id)
+            if current and current['expires_at'] > expires_at:
+                # The flusher already refreshed past this session's token
+                return
+            self._credentials[user_id] = {
+                'token': token,
+                'refresh_token': refresh_token,
+                'expires_at': expires_at,
+            }
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Erreur lors de la synchronisation de l'outbox: {str(e)}")
+
+    def flush(self):
+        """Send every due operation, keeping each user's writes in order."""
+        blocked_users = set()
+        for op in self.mirror.due_operations():
+            if op['user_id'] in blocked_users:
+                continue
+            token = self._token_for(op['user_id'])
+            if not token:
+                blocked_users.add(op['user_id'])
+                continue
+            try:
+                status = self._send(op, token)
+            except Exception as e:
+                status, error = None, e
+            else:
+                error = f"HTTP {status}"
+
+            if status == 200:
+                self.mirror.mark_done(op['id'])
+                continue
+            if status == 401:
+                self._expire(op['user_id'])
+            if status is not None and 400 <= status < 500 and status not in (401, 408, 429):
+                self.mirror.mark_failed(op['id'], error)
+                continue
+            self.mirror.mark_retry(op, error)
+            blocked_users.add(op['user_id'])
+
+    def _send(self, op, token):
+        url = f"{self.database_url}/{quote(op['path'])}.json?auth={token}"
+        if op['method'] == PUT_IF_ABSENT:
+            body = op['body']
+            if not body.get('created'):
+                existing = self._http.get(url, headers={'X-Firebase-ETag': 'true'})
+                if existing.status_code != 200:
+                    return existing.status_code
+                current = existing.json()
+                if current is not None and not is_own_record(current, body['record']):
+                    # Already saved from another session: nothing left to do
+                    return 200
+                if current is None:
+                    record = stamp_created_at(op['user_id'], {body['key']: body['record']}, self.mirror)[body['key']]
+                    status = create_if_absent(
+                        lambda method, **kwargs: self._http.request(method, url, **kwargs),
+                        record, existing.headers.get('ETag', '')
+                    )
+                    if status != 200:
+                        return 200 if status == 412 else status
+                else:
+                    # Created by an attempt whose response was lost
+                    record = current
+                # The key is ours now: a retry must only resend the updates below
+                body.update(record=record, created=True)
+                self.mirror.update_body(op['id'], body)
+            updates = {body['details_path']: body['details']}
+            updates.update(counter_updates(body['stats_path'], [body['record']]))
+            root_url = f"{self.database_url}/.json?auth={token}"
+            # Counter increments must not be replayed by the transport after a timeout
+            return self._http.request('PATCH', root_url, json=updates, idempotent=False).status_code
+        if op['method'] == ADD_WORDS:
+            existing = self._http.get(url, params={'shallow': 'true'})
+            if existing.status_code != 200:
+                return existing.status_code
+            present = existing.json() or {}
+            body = op['body']
+            records = {key: record for key, record in body['records'].items() if key not in present}
+            if not records:
+                return 200
+            records = stamp_created_at(op['user_id'], records, self.mirror)
+            updates = new_words_updates(op['path'], body['details_path'], body['stats_path'],
+                                        records, body['details'])
+            root_url = f"{self.database_url}/.json?auth={token}"
+            return self._http.request('PATCH', root_url, json=updates, idempotent=False).status_code
+        if op['method'] == RECORD_GAME_RESULT:
+            results_url = f"{self.database_url}/{quote(op['body']['results_path'])}.json?auth={token}"
+
+            def fetch_results():
+                with self._http.get(results_url, stream=True) as response:
+                    if response.status_code != 200:
+                        raise RuntimeError(f"HTTP {response.status_code}")
+                    return dict(iter_children(response))
+
+            committed = record_game_result(
+                lambda method, **kwargs: self._http.request(method, url, **kwargs),
+                fetch_results,
+                op['body']['game']
+            )
+            return 200 if committed is not None else 503
+        return self._http.request(op['method'], url, json=op['body']).status_code
+
+    def _token_for(self, user_id):
+        with self._lock:
+            credentials = self._credentials.get(user_id)
+        if not credentials:
+            return None
+        if time.time() < credentials['expires_at'] - 60:
+            return credentials['token']
+
+        result = self._auth.refresh_token(credentials['refresh_token'])
+        if not result.get('success'):
+            return None
+        self.remember_credentials(user_id, result['token'], result['refresh_token'])
+        return result['token']
+
+    def _expire(self, user_id):
+        with self._lock:
+            if user_id in self._credentials:
+                self._credentials[user_id]['expires_at'] = 0
+
+
+@st.cache_resource
+def get_local_mirror():
+    """Process-wide mirror and flusher, or None when LOCAL_MIRROR_PATH is not set."""
+    if not LOCAL_MIRROR_PATH:
+        return None
+    mirror = LocalMirror(LOCAL_MIRROR_PATH)
+    mirror.flusher = OutboxFlusher(mirror, get_transport(), os.getenv('FIREBASE_DATABASE_URL')).start()
+    return mirror
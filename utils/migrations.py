@@ -0,0 +1,206 @@
+"""
+One-shot data migrations for the VocabMaster Realtime Database.
+
+Run with admin credentials (service account JSON in FIREBASE_CREDENTIALS,
+either the JSON itself or a path to the file):
+
+    python -m utils.migrations partition [--dry-run]
+    python -m utils.migrations game-stats [--dry-run]
+    python -m utils.migrations word-stats [--dry-run]
+    python -m utils.migrations split-details [--dry-run]
+"""
+import argparse
+import json
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+FIREBASE_DATABASE_URL = os.getenv('FIREBASE_DATABASE_URL')
+FIREBASE_CREDENTIALS = os.getenv('FIREBASE_CREDENTIALS')
+
+# Top-level nodes that used to hold every user's records side by side
+PARTITIONED_ROOTS = ('words', 'game_results')
+
+# Number of records moved per multi-path update
+BATCH_SIZE = 500
+
+
+def init_admin_db():
+    """Initialize firebase-admin and return the root database reference."""
+    import firebase_admin
+    from firebase_admin import credentials, db
+
+    if not FIREBASE_CREDENTIALS or not FIREBASE_DATABASE_URL:
+        raise RuntimeError("FIREBASE_CREDENTIALS et FIREBASE_DATABASE_URL doivent être configurés.")
+
+    if os.path.exists(FIREBASE_CREDENTIALS):
+        cred = credentials.Certificate(FIREBASE_CREDENTIALS)
+    else:
+        cred = credentials.Certificate(json.loads(FIREBASE_CREDENTIALS))
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(cred, {'databaseURL': FIREBASE_DATABASE_URL})
+    return db.reference('/')
+
+
+def is_flat_record(value):
+    """Return True for a legacy record stored directly under its root node."""
+    return isinstance(value, dict) and isinstance(value.get('user_id'), str)
+
+
+def record_key(root, key, record):
+    """Key a record should be stored under: the normalized word for words."""
+    from .firebase_simple_config import word_key
+
+    if root == 'words' and record.get('word'):
+        return word_key(record['word'])
+    return key
+
+
+def plan_partition_moves(root, tree):
+    """Build the multi-path update placing every record of `root` at root/{uid}/{key}.
+
+    Moves flat records into their user's partition and re-keys words that
+    were stored under push keys. When several records map to the same
+    word, the oldest one is kept and the others are deleted.
+    """
+    from .firebase_simple_config import escape_key
+
+    tree = tree or {}
+    sources = []
+    for key, value in tree.items():
+        if is_flat_record(value):
+            sources.append((escape_key(value['user_id']), f"{root}/{key}", key, value))
+        elif isinstance(value, dict):
+            for child_key, record in value.items():
+                if isinstance(record, dict):
+                    sources.append((key, f"{root}/{key}/{child_key}", child_key, record))
+    sources.sort(key=lambda source: source[3].get('created_at', ''))
+
+    updates = {}
+    for partition, source_path, key, record in sources:
+        dest_key = record_key(root, key, record)
+        dest_path = f"{root}/{partition}/{dest_key}"
+        if dest_path == source_path:
+            continue
+        existing = tree.get(partition)
+        occupied = updates.get(dest_path) is not None or (
+            isinstance(existing, dict) and not is_flat_record(existing) and dest_key in existing
+        )
+        if not occupied:
+            updates[dest_path] = record
+        updates[source_path] = None
+    return updates
+
+
+def migrate_partitioned_layout(root_ref, dry_run=False):
+    """Move flat words/game_results records into their per-user partitions."""
+    summary = {}
+    for root in PARTITIONED_ROOTS:
+        updates = plan_partition_moves(root, root_ref.child(root).get())
+        moved = sum(1 for value in updates.values() if value is not None)
+        summary[root] = moved
+
+        if dry_run or not updates:
+            continue
+
+        # Writes are applied before deletes so an interrupted run never loses a record
+        items = sorted(updates.items(), key=lambda item: item[1] is None)
+        for start in range(0, len(items), BATCH_SIZE):
+            root_ref.update(dict(items[start:start + BATCH_SIZE]))
+    return summary
+
+
+def rebuild_game_stats(root_ref, dry_run=False):
+    """Recompute every user's game_stats/{uid} aggregate from their game history."""
+    from .game_stats import stats_from_results
+
+    results = root_ref.child('game_results').get() or {}
+    updates = {
+        f"game_stats/{uid}": stats_from_results(user_results)
+        for uid, user_results in results.items()
+        if isinstance(user_results, dict) and not is_flat_record(user_results)
+    }
+    if not dry_run:
+        items = list(updates.items())
+        for start in range(0, len(items), BATCH_SIZE):
+            root_ref.update(dict(items[start:start + BATCH_SIZE]))
+    return {'game_stats': len(updates)}
+
+
+def rebuild_word_stats(root_ref, dry_run=False):
+    """Recompute every user's word_stats/{uid} counters from their words."""
+    from .word_stats import rollup_from_words
+
+    words = root_ref.child('words').get() or {}
+    updates = {
+        f"word_stats/{uid}": rollup_from_words(user_words)
+        for uid, user_words in words.items()
+        if isinstance(user_words, dict) and not is_flat_record(user_words)
+    }
+    if not dry_run:
+        items = list(updates.items())
+        for start in range(0, len(items), BATCH_SIZE):
+            root_ref.update(dict(items[start:start + BATCH_SIZE]))
+    return {'word_stats': len(updates)}
+
+
+def plan_detail_split(words):
+    """Build the multi-path update moving detail fields from words/{uid}/{key} to word_details/{uid}/{key}."""
+    from .firebase_simple_config import DETAIL_FIELDS, split_word_doc
+
+    updates = {}
+    for uid, user_words in (words or {}).items():
+        if not isinstance(user_words, dict) or is_flat_record(user_words):
+            continue
+        for key, record in user_words.items():
+            if not isinstance(record, dict) or not any(field in record for field in DETAIL_FIELDS):
+                continue
+            updates[f"word_details/{uid}/{key}"] = split_word_doc(record)[1]
+            for field in DETAIL_FIELDS:
+                if field in record:
+                    updates[f"words/{uid}/{key}/{field}"] = None
+    return updates
+
+
+def split_word_details(root_ref, dry_run=False):
+    """Move definitions and examples out of the word index into word_details."""
+    updates = plan_detail_split(root_ref.child('words').get())
+    moved = sum(1 for value in updates.values() if value is not None)
+    if not dry_run and updates:
+        # Details are written before the index fields are dropped
+        items = sorted(updates.items(), key=lambda item: item[1] is None)
+        for start in range(0, len(items), BATCH_SIZE):
+            root_ref.update(dict(items[start:start + BATCH_SIZE]))
+    return {'word_details': moved}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrations de la base VocabMaster")
+    parser.add_argument('command', choices=['partition', 'game-stats', 'word-stats', 'split-details'])
+    parser.add_argument('--dry-run', action='store_true', help="Affiche le plan sans écrire")
+    args = parser.parse_args()
+
+    root_ref = init_admin_db()
+    if args.command == 'partition':
+        summary = migrate_partitioned_layout(root_ref, dry_run=args.dry_run)
+        for root, moved in summary.items():
+            action = "à déplacer" if args.dry_run else "déplacés"
+            print(f"{root}: {moved} enregistrements {action}")
+    elif args.command == 'game-stats':
+        summary = rebuild_game_stats(root_ref, dry_run=args.dry_run)
+        action = "à recalculer" if args.dry_run else "recalculés"
+        print(f"game_stats: {summary['game_stats']} utilisateurs {action}")
+    elif args.command == 'word-stats':
+        summary = rebuild_word_stats(root_ref, dry_run=args.dry_run)
+        action = "à recalculer" if args.dry_run else "recalculés"
+        print(f"word_stats: {summary['word_stats']} utilisateurs {action}")
+    elif args.command == 'split-details':
+        summary = split_word_details(root_ref, dry_run=args.dry_run)
+        action = "à séparer" if args.dry_run else "séparés"
+        print(f"word_details: {summary['word_details']} mots {action}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Process-wide limits on Hugging Face inference calls
+Every model call of every session goes through one token bucket, which caps
+the request rate, and one semaphore, which caps the calls in flight.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+import streamlit as st
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+AI_REQUESTS_PER_MINUTE = float(os.getenv('AI_REQUESTS_PER_MINUTE', '60'))
+AI_BURST = int(os.getenv('AI_BURST', '5'))
+AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', '4'))
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity, max_concurrent):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._in_flight = threading.BoundedSemaphore(max(1, max_concurrent))
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the concurrent slots and a token for the duration of a call."""
+        with self._in_flight:
+            self.acquire()
+            yield
+
+
+@st.cache_resource
+def get_ai_limiter():
+    """Shared by every session of the process, so the provider's limit holds globally."""
+    return TokenBucket(AI_REQUESTS_PER_MINUTE / 60, AI_BURST, AI_MAX_CONCURRENCY)
@@ -0,0 +1,252 @@
+"""
+Parsing of the model's word lookups
+The model is asked for a JSON object with the word's fields, but answers come
+wrapped in code fences or prose, with single quotes, trailing commas, cut off
+by the token budget, or with other key names. They are repaired rather than
+replaced by placeholders; fields that cannot be recovered are left empty.
+While an answer streams in, each string field is picked out as soon as its
+closing quote arrives, so pages can show it before the rest is written.
+"""
+import json
+import re
+
+WORD_FIELDS = ('word', 'definition', 'translation', 'example1', 'example2')
+
+# Key names the model uses instead of ours, compared without case, spaces or punctuation
+FIELD_ALIASES = {
+    'word': {'word', 'term', 'expression', 'phrase', 'mot', 'englishword', 'idiom'},
+    'definition': {'definition', 'def', 'meaning', 'englishdefinition', 'definitionen', 'description'},
+    'translation': {'translation', 'frenchtranslation', 'translationfr', 'translationfrench', 'french',
+                    'traduction', 'fr', 'frenchmeaning'},
+    'example1': {'example1', 'example', 'exemple1', 'sentence1', 'examplesentence1', 'firstexample',
+                 'englishexample1', 'exemple'},
+    'example2': {'example2', 'exemple2', 'sentence2', 'examplesentence2', 'secondexample', 'englishexample2'},
+}
+EXAMPLE_LIST_KEYS = {'examples', 'exemples', 'examplesentences', 'sentences', 'englishexamples'}
+
+_FIELD_BY_KEY = {alias: field for field, aliases in FIELD_ALIASES.items() for alias in aliases}
+
+# A "key": "value" pair whose value string is complete (escaped quotes allowed)
+_FIELD_RE = re.compile(r'"([^"\\]+)"\s*:\s*"((?:[^"\\]|\\.)*)"', re.DOTALL)
+
+# "Definition: ..." lines of an answer written as plain text, bold labels included
+_LINE_RE = re.compile(r'^[\s\-*#>\d.)]*\**["\']?([A-Za-z][\w ()/-]{0,30}?)["\']?\**\s*[:=]\**\s*(.+?)\s*$', re.MULTILINE)
+
+_LITERALS = {'true': 'true', 'false': 'false', 'null': 'null', 'True': 'true', 'False': 'false', 'None': 'null'}
+
+
+def field_for(key):
+    """Our field name for a key written by the model, or None."""
+    return _FIELD_BY_KEY.get(re.sub(r'[^a-z0-9]', '', str(key).lower()))
+
+
+class FieldStreamParser:
+    """Incremental reader of a JSON object's string fields.
+
+    `feed` takes the next piece of text and returns the fields completed by
+    it, each one only once.
+    """
+
+    def __init__(self, fields=WORD_FIELDS):
+        self.fields = fields
+        self._text = ''
+        self._scanned = 0
+        self._found = {}
+
+    def feed(self, chunk):
+        self._text += chunk
+        completed = {}
+        for match in _FIELD_RE.finditer(self._text, self._scanned):
+            field = field_for(match.group(1))
+            if field in self.fields and field not in self._found:
+                completed[field] = self._found[field] = _decode_string(match.group(2))
+            # Nothing before a complete pair needs scanning again
+            self._scanned = match.end()
+        return completed
+
+
+def _decode_string(raw):
+    try:
+        return json.loads(f'"{raw}"', strict=False)
+    except json.JSONDecodeError:
+        return raw
+
+
+def load_json_lenient(text, opening='{'):
+    """Parse the first JSON object (or array, with opening='[') in a model answer.
+
+    Text around it is ignored. If it does not parse as is, it is repaired
+    once; returns None if that fails too.
+    """
+    start = (text or '').find(opening)
+    if start == -1:
+        return None
+    source = text[start:]
+    value = _first_value(source)
+    if value is not None:
+        return value
+    try:
+        return json.loads(repair_json(source), strict=False)
+    except json.JSONDecodeError:
+        return None
+
+
+def _first_value(source):
+    """The leading JSON value of `source` if it is well-formed; what follows is ignored."""
+    try:
+        return json.JSONDecoder(strict=False).raw_decode(source)[0]
+    except json.JSONDecodeError:
+        return None
+
+
+def repair_json(source):
+    """Rewrite the JSON value at the start of `source` into valid JSON.
+
+    Handles single-quoted strings, unescaped quotes inside strings, bare or
+    quoted-with-spaces keys, Python literals and trailing commas. A value cut
+    off mid-way keeps its complete members only. Stops where the value ends.
+    """
+    out = []
+    # One frame per open object or array: its closing bracket, where to cut
+    # if the answer stops inside it, and whether a value is expected next
+    stack = []
+    i, length = 0, len(source)
+
+    def value_done():
+        if stack:
+            stack[-1]['cut'] = len(''.join(out))
+            stack[-1]['expect_value'] = False
+
+    def next_significant(pos):
+        while pos < length and source[pos].isspace():
+            pos += 1
+        return source[pos] if pos < length else ''
+
+    while i < length:
+        ch = source[i]
+        frame = stack[-1] if stack else None
+
+        if ch in '{[':
+            out.append(ch)
+            stack.append({'close': '}' if ch == '{' else ']', 'cut': len(''.join(out)),
+                          'expect_value': ch == '['})
+            i += 1
+        elif ch in '}]':
+            if not stack:
+                break
+            out.append(stack.pop()['close'])
+            i += 1
+            if not stack:
+                return ''.join(out)
+            value_done()
+        elif ch in '"\'':
+            string, i, closed = _read_string(source, i)
+            if not closed:
+                break
+            is_key = frame is not None and frame['close'] == '}' and not frame['expect_value']
+            out.append(json.dumps(string, ensure_ascii=False))
+            if not is_key:
+                value_done()
+        elif ch == ':':
+            out.append(ch)
+            if frame:
+                frame['expect_value'] = True
+            i += 1
+        elif ch == ',':
+            # Trailing commas are dropped
+            if next_significant(i + 1) not in ('}', ']', ''):
+                out.append(ch)
+                if frame and frame['close'] == ']':
+                    frame['expect_value'] = True
+            i += 1
+        elif ch.isspace():
+            out.append(ch)
+            i += 1
+        else:
+            match = re.match(r'[^\s,:{}\[\]"\']+(?: +[^\s,:{}\[\]"\']+)*', source[i:])
+            token = match.group(0) if match else ch
+            i += len(token)
+            if frame and frame['close'] == '}' and not frame['expect_value']:
+                # Bare key
+                out.append(json.dumps(token.strip()))
+            else:
+                out.append(_LITERALS.get(token, token))
+                value_done()
+
+    # The answer stopped inside the value: keep complete members, close the rest
+    while stack:
+        frame = stack.pop()
+        text = ''.join(out)[:frame['cut']].rstrip().rstrip(',')
+        out = [text + frame['close']]
+        value_done()
+    return ''.join(out)
+
+
+def _read_string(source, start):
+    """Read a quoted string starting at `start`; returns (value, next index, closed).
+
+    A quote only ends the string when a separator follows it, so quotes and
+    apostrophes inside the text survive.
+    """
+    quote = source[start]
+    chars = []
+    i = start + 1
+    while i < len(source):
+        ch = source[i]
+        if ch == '\\' and i + 1 < len(source):
+            escaped = source[i:i + 6] if source[i + 1] == 'u' else source[i:i + 2]
+            try:
+                chars.append(json.loads(f'"{escaped}"'))
+            except json.JSONDecodeError:
+                # \' and other escapes JSON does not know
+                chars.append(source[i + 1])
+            i += len(escaped)
+            continue
+        if ch == quote:
+            rest = source[i + 1:].lstrip()
+            if not rest or rest[0] in ',:}]':
+                return ''.join(chars), i + 1, True
+        chars.append(ch)
+        i += 1
+    return ''.join(chars), i, False
+
+
+def normalize_word_fields(data):
+    """Map a parsed answer to our fields, dropping empty values and unknown keys."""
+    fields = {}
+    for key, value in data.items():
+        normalized = re.sub(r'[^a-z0-9]', '', str(key).lower())
+        if normalized in EXAMPLE_LIST_KEYS and isinstance(value, list):
+            examples = [item for item in value if isinstance(item, str) and item.strip()]
+            for field, example in zip(('example1', 'example2'), examples):
+                fields.setdefault(field, example.strip())
+            continue
+        field = field_for(key)
+        if field is None:
+            continue
+        if isinstance(value, list):
+            value = next((item for item in value if isinstance(item, str)), '')
+        if isinstance(value, str) and value.strip() and field not in fields:
+            fields[field] = value.strip()
+    return fields
+
+
+def extract_fields_from_text(text):
+    """Fields written as 'Definition: ...' lines, for answers that are not JSON at all."""
+    fields = {}
+    for key, value in _LINE_RE.findall(text or ''):
+        field = field_for(key)
+        value = value.rstrip(',').strip().strip('"\'').strip()
+        if field and value and field not in fields:
+            fields[field] = value
+    return fields
+
+
+def parse_word_response(text):
+    """Recover as many word fields as possible from a lookup answer."""
+    data = load_json_lenient(text, '{')
+    if isinstance(data, dict):
+        # Fields missing from a JSON answer were not written (or cut off): the
+        # text around it is not searched, it would only yield truncated values
+        return normalize_word_fields(data)
+    return extract_fields_from_text(text)
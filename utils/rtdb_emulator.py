@@ -0,0 +1,275 @@
+"""
+Local stand-in for the Realtime Database REST API
+Implements the subset VocabMaster uses (GET with queries and ETags,
+conditional PUT, POST push keys, multi-path PATCH with server values, DELETE)
+so the data paths can be benchmarked and load-tested without a Firebase project.
+Rules and `auth` are not checked.
+
+Usage:
+    python -m utils.rtdb_emulator --port 9000 [--data rtdb.json]
+then set FIREBASE_DATABASE_URL=http://localhost:9000
+"""
+import argparse
+import copy
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+PUSH_CHARS = '-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz'
+
+
+def push_key():
+    """Chronologically sortable 20-character key, like Firebase push IDs."""
+    now = int(time.time() * 1000)
+    prefix = ''
+    for _ in range(8):
+        prefix = PUSH_CHARS[now % 64] + prefix
+        now //= 64
+    return prefix + ''.join(random.choice(PUSH_CHARS) for _ in range(12))
+
+
+def etag_of(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def split_path(path):
+    return [part for part in path.split('/') if part]
+
+
+class Database:
+    """JSON tree with RTDB write semantics: nulls and empty objects are pruned."""
+
+    def __init__(self, data_file=None):
+        self.data_file = data_file
+        self.root = None
+        self.lock = threading.Lock()
+        if data_file:
+            try:
+                with open(data_file, encoding='utf-8') as f:
+                    self.root = json.load(f)
+            except FileNotFoundError:
+                pass
+
+    def get(self, parts):
+        node = self.root
+        for part in parts:
+            if not isinstance(node, dict) or part not in node:
+                return None
+            node = node[part]
+        return node
+
+    def set(self, parts, value):
+        value = self._prune(value)
+        if not parts:
+            self.root = value
+            return
+        if not isinstance(self.root, dict):
+            self.root = {}
+        node = self.root
+        chain = []
+        for part in parts[:-1]:
+            if not isinstance(node.get(part), dict):
+                node[part] = {}
+            chain.append((node, part))
+            node = node[part]
+        if value is None:
+            node.pop(parts[-1], None)
+        else:
+            node[parts[-1]] = value
+        # Drop parents left empty by a delete
+        for parent, part in reversed(chain):
+            if parent[part]:
+                break
+            del parent[part]
+        if not self.root:
+            self.root = None
+
+    def resolve_server_values(self, parts, value):
+        """Replace {'.sv': ...} placeholders using the value currently stored at `parts`."""
+        if not isinstance(value, dict):
+            return value
+        if '.sv' in value:
+            server_value = value['.sv']
+            if server_value == 'timestamp':
+                return int(time.time() * 1000)
+            if isinstance(server_value, dict) and 'increment' in server_value:
+                current = self.get(parts)
+                current = current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0
+                return current + server_value['increment']
+            raise ValueError(f"Unsupported server value: {server_value}")
+        return {key: self.resolve_server_values(parts + [key], child) for key, child in value.items()}
+
+    def save(self):
+        if self.data_file:
+            with open(self.data_file, 'w', encoding='utf-8') as f:
+                json.dump(self.root, f)
+
+    def _prune(self, value):
+        if isinstance(value, dict):
+            pruned = {key: self._prune(child) for key, child in value.items()}
+            pruned = {key: child for key, child in pruned.items() if child is not None}
+            return pruned or None
+        return value
+
+
+def apply_query(value, params):
+    """Apply orderBy / startAt / endAt / equalTo / limitTo* to a node's children."""
+    order_by = json.loads(params['orderBy']) if 'orderBy' in params else None
+    if order_by is None or not isinstance(value, dict):
+        return value
+
+    def sort_value(item):
+        key, child = item
+        if order_by == '$key':
+            return key
+        if order_by == '$value':
+            return child
+        return child.get(order_by) if isinstance(child, dict) else None
+
+    def comparable(v):
+        # RTDB orders null < booleans < numbers < strings < objects
+        if v is None:
+            return (0, 0)
+        if isinstance(v, bool):
+            return (1, v)
+        if isinstance(v, (int, float)):
+            return (2, v)
+        if isinstance(v, str):
+            return (3, v)
+        return (4, 0)
+
+    items = sorted(value.items(), key=lambda item: (comparable(sort_value(item)), item[0]))
+    if 'equalTo' in params:
+        target = comparable(json.loads(params['equalTo']))
+        items = [item for item in items if comparable(sort_value(item)) == target]
+    if 'startAt' in params:
+        start = comparable(json.loads(params['startAt']))
+        items = [item for item in items if comparable(sort_value(item)) >= start]
+    if 'endAt' in params:
+        end = comparable(json.loads(params['endAt']))
+        items = [item for item in items if comparable(sort_value(item)) <= end]
+    if 'limitToFirst' in params:
+        items = items[:int(params['limitToFirst'])]
+    if 'limitToLast' in params:
+        items = items[-int(params['limitToLast']):] if int(params['limitToLast']) else []
+    return dict(items)
+
+
+class RTDBHandler(BaseHTTPRequestHandler):
+    database = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _target(self):
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        if not path.endswith('.json'):
+            return None, None
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        return split_path(path[:-len('.json')]), params
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'null')
+
+    def _reply(self, status, value, etag=None):
+        payload = json.dumps(value).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        if etag is not None:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self, method):
+        parts, params = self._target()
+        if parts is None:
+            return self._reply(404, {'error': 'Not found'})
+        wants_etag = self.headers.get('X-Firebase-ETag', '').lower() == 'true'
+        db = self.database
+        try:
+            body = None if method in ('GET', 'DELETE') else self._body()
+        except json.JSONDecodeError:
+            return self._reply(400, {'error': 'Invalid data; couldn\'t parse JSON object.'})
+
+        with db.lock:
+            current = db.get(parts)
+            if method == 'GET':
+                value = apply_query(current, params)
+                if params.get('shallow') == 'true' and isinstance(value, dict):
+                    # Like the real server, primitive children keep their value
+                    value = {key: True if isinstance(child, (dict, list)) else child for key, child in value.items()}
+                return self._reply(200, value, etag_of(current) if wants_etag else None)
+
+            if_match = self.headers.get('if-match')
+            if if_match is not None and if_match != etag_of(current):
+                return self._reply(412, current, etag_of(current))
+
+            if method == 'PUT':
+                result = db.resolve_server_values(parts, body)
+                db.set(parts, copy.deepcopy(result))
+            elif method == 'POST':
+                key = push_key()
+                db.set(parts + [key], db.resolve_server_values(parts + [key], body))
+                result = {'name': key}
+            elif method == 'PATCH':
+                if not isinstance(body, dict):
+                    return self._reply(400, {'error': 'Invalid data; PATCH requires an object.'})
+                result = {}
+                for path, value in body.items():
+                    child = parts + split_path(path)
+                    result[path] = db.resolve_server_values(child, value)
+                    db.set(child, copy.deepcopy(result[path]))
+            else:
+                db.set(parts, None)
+                result = None
+            db.save()
+            new_value = db.get(parts)
+        self._reply(200, result, etag_of(new_value) if wants_etag else None)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PATCH(self):
+        self._handle('PATCH')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+
+def serve(port=9000, data_file=None, host='127.0.0.1'):
+    """Create the server; call serve_forever() on the result (or run it in a thread)."""
+    handler = type('BoundRTDBHandler', (RTDBHandler,), {'database': Database(data_file)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Realtime Database REST stand-in")
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--data', help="JSON file used to persist the database between runs")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.data, args.host)
+    print(f"Realtime Database stand-in on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
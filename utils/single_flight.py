@@ -0,0 +1,61 @@
+"""
+Request coalescing for identical concurrent reads
+When several callers ask for the same key while a call is in flight, only
+the first one runs it; the others wait for and share its result.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+import streamlit as st
+
+
+class SingleFlight:
+    """Thread version, used by the sync manager's requests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """Return fn(), or the result of the identical call already running."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        if not leader:
+            return call.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+class AsyncSingleFlight:
+    """asyncio version, for coroutines running on one event loop."""
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, coro_fn):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coro_fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # A caller giving up must not cancel the request for the others
+        return await asyncio.shield(task)
+
+
+@st.cache_resource
+def get_single_flight():
+    """Shared by every page's manager, so sessions of the whole process coalesce."""
+    return SingleFlight()
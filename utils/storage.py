@@ -0,0 +1,322 @@
+"""
+Pluggable storage for VocabMaster
+STORAGE_BACKEND selects where words and game results live:
+- firebase (default): Realtime Database through FirebaseSimpleManager
+- sqlite: a local SQLite file (STORAGE_SQLITE_PATH)
+- memory: in-process dictionaries, for tests and benchmarks
+"""
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+import streamlit as st
+from dotenv import load_dotenv
+from .data_manager import DataManager
+from .firebase_simple_config import (
+    DETAIL_FIELDS, FirebaseSimpleManager, page_of_records, split_word_doc, word_key
+)
+from .game_stats import stats_from_results, summarize_game_stats
+from .word_stats import monthly_series, rollup_from_words
+
+# Load environment variables
+load_dotenv()
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'firebase').lower()
+STORAGE_SQLITE_PATH = os.getenv('STORAGE_SQLITE_PATH', 'vocabmaster.db')
+
+
+class StorageBackend(ABC):
+    """Data operations the app needs, for an explicit user id.
+
+    Subclasses provide `_records` and `_insert`; the other operations have
+    generic implementations they can override with cheaper native queries.
+    """
+
+    @abstractmethod
+    def _records(self, collection, user_id):
+        """Return the user's records of `collection` keyed by record key."""
+
+    @abstractmethod
+    def _insert(self, collection, user_id, records):
+        """Store records whose key is not taken yet; return the keys actually inserted."""
+
+    def add_words(self, user_id, word_docs):
+        """Store new words; returns one status per doc: 'added', 'duplicate' or 'invalid'.
+
+        Like on Firebase, the listed index and the long detail fields are kept apart.
+        """
+        statuses = []
+        new_records = {}
+        new_details = {}
+        for word_doc in word_docs:
+            key = word_key(word_doc.get('word', ''))
+            if not key:
+                statuses.append((None, 'invalid'))
+            elif key in new_records:
+                statuses.append((key, 'duplicate'))
+            else:
+                new_records[key], new_details[key] = split_word_doc(word_doc)
+                statuses.append((key, 'pending'))
+
+        inserted = self._insert('words', user_id, new_records)
+        self._insert('word_details', user_id, {key: new_details[key] for key in inserted})
+        return [
+            status if status != 'pending' else ('added' if key in inserted else 'duplicate')
+            for key, status in statuses
+        ]
+
+    def list_words(self, user_id):
+        words = list(self._records('words', user_id).values())
+        words.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+        return words
+
+    def word_details(self, user_id, keys):
+        """Detail payloads of the given word keys; unknown keys are left out."""
+        details = self._records('word_details', user_id)
+        return {key: details[key] for key in keys if key in details}
+
+    def words_page(self, user_id, cursor=None, limit=20, order='desc'):
+        return page_of_records(self._records('words', user_id), cursor, limit, order)
+
+    def count_words(self, user_id):
+        return len(self._records('words', user_id))
+
+    def save_result(self, user_id, game_doc):
+        self._insert('game_results', user_id, {game_doc['id']: game_doc})
+        return True
+
+    def game_stats(self, user_id):
+        return summarize_game_stats(stats_from_results(self._records('game_results', user_id)))
+
+    def monthly_progress(self, user_id):
+        return monthly_series(rollup_from_words(self._records('words', user_id)))
+
+
+class MemoryStorage(StorageBackend):
+    """Process-local dictionaries; contents are lost on restart."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _records(self, collection, user_id):
+        with self._lock:
+            return dict(self._data.get((collection, user_id), {}))
+
+    def _insert(self, collection, user_id, records):
+        with self._lock:
+            existing = self._data.setdefault((collection, user_id), {})
+            inserted = {key for key in records if key not in existing}
+            existing.update({key: records[key] for key in inserted})
+            return inserted
+
+
+class SQLiteStorage(StorageBackend):
+    """Single-file storage for small deployments without Firebase."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS records (
+        collection TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        key TEXT NOT NULL,
+        created_at TEXT NOT NULL DEFAULT '',
+        data TEXT NOT NULL,
+        PRIMARY KEY (collection, user_id, key)
+    );
+    CREATE INDEX IF NOT EXISTS records_by_date ON records (collection, user_id, created_at, key);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(self.SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _records(self, collection, user_id):
+        rows = self._conn().execute(
+            "SELECT key, data FROM records WHERE collection = ? AND user_id = ?", (collection, user_id)
+        )
+        return {key: json.loads(data) for key, data in rows}
+
+    def _insert(self, collection, user_id, records):
+        conn = self._conn()
+        inserted = set()
+        with conn:
+            for key, record in records.items():
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO records (collection, user_id, key, created_at, data) VALUES (?, ?, ?, ?, ?)",
+                    (collection, user_id, key, record.get('created_at') or record.get('played_at') or '', json.dumps(record))
+                )
+                if cursor.rowcount:
+                    inserted.add(key)
+        return inserted
+
+    def words_page(self, user_id, cursor=None, limit=20, order='desc'):
+        comparison, direction = ('<', 'DESC') if order == 'desc' else ('>', 'ASC')
+        query = "SELECT key, created_at, data FROM records WHERE collection = 'words' AND user_id = ?"
+        params = [user_id]
+        if cursor:
+            query += f" AND (created_at, key) {comparison} (?, ?)"
+            params += [cursor['created_at'], cursor['key']]
+        query += f" ORDER BY created_at {direction}, key {direction} LIMIT ?"
+        params.append(limit + 1)
+
+        rows = self._conn().execute(query, params).fetchall()
+        page = rows[:limit]
+        next_cursor = {'created_at': page[-1][1], 'key': page[-1][0]} if len(rows) > limit else None
+        return {'words': [json.loads(data) for _, _, data in page], 'next_cursor': next_cursor}
+
+    def word_details(self, user_id, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        rows = self._conn().execute(
+            f"SELECT key, data FROM records WHERE collection = 'word_details' AND user_id = ? "
+            f"AND key IN ({', '.join('?' * len(keys))})",
+            [user_id] + keys
+        )
+        return {key: json.loads(data) for key, data in rows}
+
+    def count_words(self, user_id):
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM records WHERE collection = 'words' AND user_id = ?", (user_id,)
+        ).fetchone()
+        return row[0]
+
+    def monthly_progress(self, user_id):
+        rows = self._conn().execute(
+            "SELECT substr(created_at, 1, 7) AS month, COUNT(*) FROM records "
+            "WHERE collection = 'words' AND user_id = ? AND created_at != '' GROUP BY month ORDER BY month",
+            (user_id,)
+        )
+        return [{'month': month, 'count': count} for month, count in rows]
+
+
+class StorageManager(DataManager):
+    """Page-facing manager running the data operations on a StorageBackend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def add_word_outcome(self, word_data):
+        """Add a word without writing to the page; returns (status, message)"""
+        try:
+            user_id = self._signed_in_user_id()
+            if not user_id:
+                return 'error', "Utilisateur non authentifié."
+            status = self.backend.add_words(user_id, [self._build_word_doc(word_data, user_id)])[0]
+            if status == 'duplicate':
+                return status, f"Le mot '{word_data.get('word', '')}' existe déjà dans votre liste."
+            if status == 'invalid':
+                return status, "Le mot à ajouter est vide."
+            return status, None
+        except Exception as e:
+            return 'error', f"Erreur lors de l'ajout du mot: {str(e)}"
+
+    def add_words(self, words_data):
+        """Add several words; returns [{'word', 'status'}] in input order"""
+        try:
+            user_id = self._user_id()
+            if not user_id:
+                return [{'word': w.get('word', ''), 'status': 'error'} for w in words_data]
+            docs = [self._build_word_doc(word_data, user_id) for word_data in words_data]
+            statuses = self.backend.add_words(user_id, docs)
+            return [{'word': doc['word'], 'status': status} for doc, status in zip(docs, statuses)]
+        except Exception as e:
+            st.error(f"Erreur lors de l'ajout des mots: {str(e)}")
+            return [{'word': w.get('word', ''), 'status': 'error'} for w in words_data]
+
+    def get_all_words(self):
+        """Retrieve all words for the current user, newest first"""
+        try:
+            user_id = self._user_id()
+            return self.backend.list_words(user_id) if user_id else []
+        except Exception as e:
+            st.error(f"Erreur lors de la récupération des mots: {str(e)}")
+            return []
+
+    def get_words_page(self, cursor=None, limit=20, order='desc'):
+        """Get one page of the current user's words"""
+        try:
+            user_id = self._user_id()
+            if not user_id:
+                return {'words': [], 'next_cursor': None}
+            return self.backend.words_page(user_id, cursor, limit, order)
+        except Exception as e:
+            st.error(f"Erreur lors de la récupération des mots: {str(e)}")
+            return {'words': [], 'next_cursor': None}
+
+    def get_words_details(self, words):
+        """Return full records for listed words (index projections), in the same order"""
+        empty = dict.fromkeys(DETAIL_FIELDS, '')
+        try:
+            user_id = self._user_id()
+            if not user_id:
+                return [{**empty, **word} for word in words]
+            details = self.backend.word_details(user_id, {word_key(w.get('word', '')) for w in words})
+            return [{**word, **details.get(word_key(word.get('word', '')), empty)} for word in words]
+        except Exception as e:
+            st.error(f"Erreur lors de la récupération des détails: {str(e)}")
+            return [{**empty, **word} for word in words]
+
+    def save_game_outcome(self, score, total_questions):
+        """Save a game result without writing to the page; returns ('saved' or 'error', message)"""
+        try:
+            user_id = self._signed_in_user_id()
+            if not user_id:
+                return 'error', "Utilisateur non authentifié."
+            self.backend.save_result(user_id, self._build_game_doc(score, total_questions, user_id))
+            return 'saved', None
+        except Exception as e:
+            return 'error', f"Erreur lors de la sauvegarde du score: {str(e)}"
+
+    def get_game_stats(self):
+        """Get game statistics for current user"""
+        try:
+            user_id = self._user_id()
+            if user_id:
+                return self.backend.game_stats(user_id)
+        except Exception as e:
+            st.error(f"Erreur lors de la récupération des statistiques: {str(e)}")
+        return {'total_games': 0, 'best_score': 0, 'average_score': 0}
+
+    def get_total_words_count(self):
+        """Get total number of words for current user"""
+        try:
+            user_id = self._user_id()
+            return self.backend.count_words(user_id) if user_id else 0
+        except Exception:
+            return 0
+
+    def get_monthly_progress(self):
+        """Get monthly learning progress for current user"""
+        try:
+            user_id = self._user_id()
+            return self.backend.monthly_progress(user_id) if user_id else []
+        except Exception as e:
+            st.error(f"Erreur lors de la récupération des données mensuelles: {str(e)}")
+            return []
+
+
+@st.cache_resource
+def get_storage_backend(kind, sqlite_path=STORAGE_SQLITE_PATH):
+    """One local backend per process, shared by every page and session."""
+    if kind == 'memory':
+        return MemoryStorage()
+    if kind == 'sqlite':
+        return SQLiteStorage(sqlite_path)
+    raise ValueError(f"STORAGE_BACKEND inconnu: {kind}")
+
+
+def create_data_manager(transport=None, backend=STORAGE_BACKEND):
+    """Build the data manager the pages use, according to STORAGE_BACKEND."""
+    if backend == 'firebase':
+        return FirebaseSimpleManager(transport=transport)
+    return StorageManager(get_storage_backend(backend))
@@ -0,0 +1,115 @@
+"""
+Process-wide cache of each user's word records
+Shared by every session of a worker so repeated reads skip the network
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+import streamlit as st
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+WORD_CACHE_TTL = float(os.getenv('WORD_CACHE_TTL', '300'))
+WORD_CACHE_MAX_USERS = int(os.getenv('WORD_CACHE_MAX_USERS', '500'))
+WORD_DETAILS_CACHE_SIZE = int(os.getenv('WORD_DETAILS_CACHE_SIZE', '5000'))
+
+
+class WordCache:
+    def __init__(self, ttl=WORD_CACHE_TTL, max_users=WORD_CACHE_MAX_USERS):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """Return the user's entry ({'records', 'high_water', 'fetched_at'}), fresh or not."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+            return entry
+
+    def is_fresh(self, entry):
+        return time.time() - entry['fetched_at'] < self.ttl
+
+    def store(self, user_id, records, high_water=None):
+        """Replace the user's snapshot with records freshly read from the database.
+
+        `high_water` is the newest `created_at` seen on the server; the next
+        sync only asks for records from that point on.
+        """
+        with self._lock:
+            self._entries[user_id] = {'records': records, 'high_water': high_water, 'fetched_at': time.time()}
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def merge(self, user_id, records, high_water):
+        """Fold a delta read from the database into the user's snapshot.
+
+        Returns the merged records, or None if the snapshot was evicted meanwhile.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            entry['records'] = {**entry['records'], **records}
+            entry['high_water'] = high_water
+            entry['fetched_at'] = time.time()
+            return entry['records']
+
+    def put_record(self, user_id, key, record):
+        """Write-through after a successful write: update the snapshot in place."""
+        self.put_records(user_id, {key: record})
+
+    def put_records(self, user_id, records):
+        # The high-water mark is left alone: it only moves on reads from the
+        # server, so records written meanwhile by other sessions are not skipped
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            entry['records'] = {**entry['records'], **records}
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+class DetailCache:
+    """LRU of word detail payloads keyed by (user_id, word key).
+
+    Details never change once a word is saved, so entries do not expire.
+    """
+
+    def __init__(self, max_entries=WORD_DETAILS_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, key):
+        with self._lock:
+            details = self._entries.get((user_id, key))
+            if details is not None:
+                self._entries.move_to_end((user_id, key))
+            return details
+
+    def put(self, user_id, key, details):
+        with self._lock:
+            self._entries[(user_id, key)] = details
+            self._entries.move_to_end((user_id, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+@st.cache_resource
+def get_word_cache():
+    """Single cache per process so pages and sessions see each other's writes."""
+    return WordCache()
+
+
+@st.cache_resource
+def get_detail_cache():
+    return DetailCache()
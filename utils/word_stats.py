@@ -0,0 +1,74 @@
+"""
+Per-user word counters maintained on write
+word_stats/{uid} holds the total number of words and per-month / per-day
+counts, so the progress chart never scans the vocabulary.
+Increments are only sent for words confirmed new on the server, but a write
+whose response is lost can still land twice or not at all, so the counters
+are rebuilt from the words once they are older than REBUILD_AFTER.
+"""
+import time
+
+# Age (seconds) after which counters are rebuilt from the word list
+REBUILD_AFTER = 7 * 24 * 3600
+
+
+def counter_updates(stats_path, word_docs):
+    """Multi-path update incrementing the counters for newly saved words.
+
+    Uses the Realtime Database `increment` server value, so concurrent
+    writers never lose each other's counts.
+    """
+    counts = {}
+    for word_doc in word_docs:
+        created_at = word_doc.get('created_at', '')
+        paths = [f"{stats_path}/total"]
+        if created_at:
+            paths += [f"{stats_path}/monthly/{created_at[:7]}", f"{stats_path}/daily/{created_at[:10]}"]
+        for path in paths:
+            counts[path] = counts.get(path, 0) + 1
+    return {path: {'.sv': {'increment': count}} for path, count in counts.items()}
+
+
+def new_words_updates(words_path, details_path, stats_path, records, details):
+    """Root multi-path update saving words confirmed new, their details and their counts."""
+    updates = {f"{words_path}/{key}": record for key, record in records.items()}
+    updates.update({f"{details_path}/{key}": details[key] for key in records})
+    # Counters are bumped in the same atomic write as the words
+    updates.update(counter_updates(stats_path, records.values()))
+    return updates
+
+
+def rollup_from_words(records):
+    """Build the full counters node from the user's word records."""
+    rollup = {'built': True, 'built_at': time.time(), 'total': 0, 'monthly': {}, 'daily': {}}
+    for word_doc in (records or {}).values():
+        rollup['total'] += 1
+        created_at = word_doc.get('created_at', '')
+        if created_at:
+            month, day = created_at[:7], created_at[:10]
+            rollup['monthly'][month] = rollup['monthly'].get(month, 0) + 1
+            rollup['daily'][day] = rollup['daily'].get(day, 0) + 1
+    return rollup
+
+
+def is_complete(rollup):
+    """Counters only describe the whole vocabulary once they were built from it.
+
+    Increments on a user who predates the counters create a partial node
+    without the `built` flag.
+    """
+    return bool(rollup and rollup.get('built'))
+
+
+def needs_rebuild(rollup, now=None):
+    """Whether the counters are missing, partial or old enough to have drifted."""
+    if not is_complete(rollup):
+        return True
+    built_at = rollup.get('built_at')
+    return not isinstance(built_at, (int, float)) or (now or time.time()) - built_at > REBUILD_AFTER
+
+
+def monthly_series(rollup):
+    """Monthly counts as the sorted [{'month', 'count'}] list the Stats page expects."""
+    monthly = (rollup or {}).get('monthly') or {}
+    return [{'month': month, 'count': count} for month, count in sorted(monthly.items())]